@@ -1,3 +1,4 @@
+import math
 import os
 import sys
 import tempfile
@@ -10,24 +11,108 @@ from PyQt6.QtWidgets import QHBoxLayout, QLabel, QProgressBar, QVBoxLayout, QWid
 from skimage.transform import resize
 
 from qt.app import TerrainApp
+from qt.chunks import ChunkManager
 from qt.tracks import circle_track
 from qt.tree import PTImgPath, PTStatic
-from terrain.generation.erosion import add_erosion
-from terrain.generation.fractal import generate_fractal_noise
+from qt.worker import GenerationRunner
+from terrain.generation.erosion import (
+    add_erosion,
+    add_hydraulic_erosion,
+    add_thermal_erosion,
+)
+from terrain.generation.fractal import (
+    generate_fractal_noise,
+    generate_progressive_fractal_noise,
+)
+from terrain.generation.hydrology import add_rivers, analyze_drainage
 from terrain.generation.noise import (
-    domain_warp,
+    NOISE_DERIVATIVES,
+    apply_warp,
     generate_billow_noise,
     generate_perlin_noise,
     generate_ridge_noise,
     generate_simplex_noise,
+    warp_field,
 )
+from terrain.pipeline.cache import StageCache
+from terrain.pipeline.dependencies import DependencyMap
 from terrain.style_transfer.neural_style import apply_neural_style
+from terrain.visualization.lod import build_lod_meshes
 from terrain.visualization.pyvista_vis import (
+    add_tree_mesh,
+    build_tree_mesh,
     generate_tree_density,
     plot_terrain,
+    update_terrain,
     visualize_terrain_with_trees,
 )
 
+# Longest side of the low resolution terrain shown first during live preview
+PREVIEW_SIZE = 128
+
+# Pipeline stages and the parameters they read, upstream first
+PIPELINE = DependencyMap(
+    [
+        ("warp", ["Shape", "Scale", "Offset", "Zoom", "Domain Warp Function"]),
+        (
+            "noise",
+            [
+                "Noise",
+                "Fractal",
+                "Fractal Noise",
+                "Warp Once For All Octaves",
+                "Progressive Refinement",
+            ],
+        ),
+        ("rivers", ["Rivers", "River Function"]),
+        ("erosion", ["Erosion", "Erosion Function"]),
+        ("scale", ["Height Scale"]),
+        ("trees", ["Trees Enabled"]),
+    ]
+)
+
+# Stages slow enough at full resolution to be worth a low resolution preview
+PREVIEWED_STAGES = {"warp", "noise", "erosion", "rivers"}
+
+# Terrains with at least this many samples are shown as adaptive meshes with
+# levels of detail instead of the full grid
+LOD_MIN_SIZE = 1 << 20
+
+
+def preview_shape(shape, size=PREVIEW_SIZE):
+    """
+    Shape downsampled by a whole factor so its longest side is at most size,
+    or None if the shape is already small enough.
+    """
+    factor = math.ceil(max(shape) / size)
+    if factor <= 1:
+        return None
+    return tuple(math.ceil(n / factor) for n in shape)
+
+
+def invalid_view(shape, scale, offset, zoom):
+    """
+    Message about the first malformed view parameter, or None if all are valid.
+    Edits are parsed as Python literals, so a half typed tuple such as "(10"
+    reads as a number or an empty string.
+    """
+
+    def is_number(value):
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+    def is_pair(value):
+        return isinstance(value, tuple) and len(value) == 2
+
+    if not (is_pair(shape) and all(isinstance(n, int) and n > 0 for n in shape)):
+        return f"Shape must be two positive integers, got {shape!r}"
+    if not (is_pair(offset) and all(is_number(n) for n in offset)):
+        return f"Offset must be two numbers, got {offset!r}"
+    if not (is_number(scale) and scale > 0):
+        return f"Scale must be a positive number, got {scale!r}"
+    if not (is_number(zoom) and zoom > 0):
+        return f"Zoom must be a positive number, got {zoom!r}"
+    return None
+
 
 def downsample_to_size(arr, target_shape):
     return resize(arr, target_shape, mode="reflect", anti_aliasing=True)
@@ -89,10 +174,21 @@ def get_update_plotter(app):
     ipanel = app.ipanel
     lpanel = app.lpanel
 
-    # Function to update the plotter when the user pushes the update button
-    def update_plotter():
-        plotter.clear()
+    # Stage outputs are reused across updates while their parameters and
+    # upstream stages are unchanged
+    cache = StageCache()
+
+    # Noise, erosion and trees are generated in the background; a newer update
+    # cancels the generation still in flight
+    generator = GenerationRunner()
 
+    # Worlds larger than one mesh are streamed in chunks along the camera track
+    chunks = ChunkManager(plotter)
+    app.get_view().stream_chunks(chunks)
+
+    # Function to update the plotter when the user pushes the update button, or
+    # to preview the terrain after the changed parameters were edited
+    def update_plotter(changed=None):
         # Register noise functions
         noise_opt = lpanel.register_option("Noise")
         noise_functions = {
@@ -117,23 +213,56 @@ def get_update_plotter(app):
 
         lpanel.register_value("Domain Warp", PTStatic(""))
         d_warp = lpanel.register_function(
-            "Domain Warp Function", domain_warp, show=["strength", "falloff", "warps"]
+            "Domain Warp Function",
+            warp_field,
+            show=["strength", "falloff", "warps", "warp_octaves"],
         )
-        ipanel.register_function("Domain Warp", domain_warp)
+        ipanel.register_function("Domain Warp", warp_field)
 
         generate_noise = noise_opt.get_active_option()
 
         # Fractal noise params
         is_fractal_enabled = lpanel.register_value("Fractal", False)
+        is_warp_hoisted = lpanel.register_value("Warp Once For All Octaves", True)
+        is_progressive_enabled = lpanel.register_value("Progressive Refinement", True)
         generate_fractal = lpanel.register_function(
             "Fractal Noise",
             generate_fractal_noise,
             show=["octaves", "persistence", "lacunarity"],
         )
 
+        # Rivers and lakes from the drainage of the noise, carved before erosion
+        # so the eroded channels follow them
+        is_rivers_enabled = lpanel.register_value("Rivers", False)
+        carve_rivers = lpanel.register_function(
+            "River Function",
+            add_rivers,
+            show=["river_threshold", "river_depth", "river_width", "fill_lakes"],
+        )
+        ipanel.register_function("Rivers", add_rivers)
+
         # Erosion
         is_erosion_enabled = lpanel.register_value("Erosion", False)
-        apply_erosion = lpanel.register_function("Erosion Function", add_erosion)
+        erosion_opt = lpanel.register_option("Erosion Function")
+        erosion_opt.register_function("Slope", add_erosion, show=["erosion_factor"])
+        erosion_opt.register_function(
+            "Hydraulic",
+            add_hydraulic_erosion,
+            show=[
+                "droplets",
+                "erode_rate",
+                "deposit_rate",
+                "evaporation",
+                "seed",
+                "flow_weight",
+            ],
+        )
+        erosion_opt.register_function(
+            "Thermal", add_thermal_erosion, show=["talus", "rate", "tolerance"]
+        )
+        ipanel.register_function("Hydraulic Erosion", add_hydraulic_erosion)
+        ipanel.register_function("Thermal Erosion", add_thermal_erosion)
+        apply_erosion = erosion_opt.get_active_option()
 
         # Post-process
         height_scale = lpanel.register_value("Height Scale", 10)
@@ -160,148 +289,430 @@ def get_update_plotter(app):
         style_weight_val = console.register_value("Style Weight", 1e-5)
         content_weight_val = console.register_value("Noise Weight", 2.5e-11)
         tv_weight_val = console.register_value("Total Variation Weight", 1e-10)
+        is_live_preview = console.register_value("Live Preview", True)
+        is_streamed = console.register_value("Stream Chunks", False)
+
+        # Malformed values are skipped until the edit is finished
+        message = invalid_view(shape, scale, offset, zoom)
+        if message is not None:
+            print(message, file=sys.stderr)
+            return
+
+        # Live previews only rerun the stages affected by the edited parameters,
+        # with a low resolution pass first when an expensive stage is affected.
+        # Style transfer is too slow to preview and waits for Update.
+        low_shape = None
+        if changed is not None:
+            stages = PIPELINE.affected(changed)
+            if not stages or not is_live_preview.value():
+                return
+            if is_style_transfer_enabled.value():
+                return
+            if PREVIEWED_STAGES.intersection(stages):
+                low_shape = preview_shape(shape)
+
+        # Generation runs on a worker thread, so it gets a snapshot of the
+        # parameters instead of reading the widgets while the user edits them
+        d_warp = d_warp.snapshot()
+        generate_noise = generate_noise.snapshot()
+        generate_fractal = generate_fractal.snapshot()
+        apply_erosion = apply_erosion.snapshot()
+        carve_rivers = carve_rivers.snapshot()
+        is_fractal = is_fractal_enabled.value()
+        is_hoisted = is_warp_hoisted.value()
+        is_eroded = is_erosion_enabled.value()
+        with_rivers = is_rivers_enabled.value()
+        is_styled = is_style_transfer_enabled.value()
+        with_trees = is_tree_enabled.value()
+        terrain_scale = height_scale.value()
+
+        # Large fractal terrains are shown at 1/8 resolution first and refined
+        is_progressive = (
+            is_fractal
+            and is_progressive_enabled.value()
+            and preview_shape(shape) is not None
+        )
+
+        def run_pipeline(token, shape, with_trees, progressive=False):
+            view = (shape, scale, offset, zoom)
+
+            # Unwarped Perlin and Simplex noise come with analytic derivatives,
+            # which replace finite differences for slope erosion, and for tree
+            # slopes and shading normals while the terrain is the bare noise.
+            # Adaptive LOD meshes are not shaded by them.
+            is_bare = not (is_eroded or with_rivers)
+            with_gradient = (
+                generate_noise.func in NOISE_DERIVATIVES
+                and not d_warp.params()[1]["warps"]
+                and not progressive
+                and not is_styled
+                and (
+                    (
+                        is_eroded
+                        and not with_rivers
+                        and "gradient" in apply_erosion.defaults
+                    )
+                    or (is_bare and (with_trees or shape[0] * shape[1] < LOD_MIN_SIZE))
+                )
+            )
+
+            def noise_and_gradient(x, y, shape, scale, zoom):
+                derivative = NOISE_DERIVATIVES[generate_noise.func]
+                noise, dx, dy = derivative(x, y, **generate_noise.params()[1])
+                # Chain rule from sample coordinates to grid cells
+                dx *= (scale / zoom) / shape[1]
+                dy *= (scale / zoom) / shape[0]
+                return noise, dx, dy
+
+            if is_fractal:
+                # The warp field of the first octave is reused by every octave,
+                # scaled by the octave frequency, unless hoisting is disabled.
+                # Progressive refinement needs it at the shape of every level.
+                base_scale = scale / zoom
+                warp_key = cache.key("base warp", None, d_warp.params(), view)
+
+                def base_warp(shape):
+                    level_view = (shape, scale, offset, zoom)
+                    return cache.get(
+                        cache.key("base warp", None, d_warp.params(), level_view),
+                        lambda: d_warp(shape, base_scale, offset, zoom),
+                    )
 
-        noise = None
-        if is_fractal_enabled.value():
+                def warp_and_noise(shape=shape, scale=scale, offset=offset, zoom=zoom):
+                    token.check()
+                    if is_hoisted:
+                        displacement, frequency = base_warp(shape), scale / base_scale
+                    else:
+                        displacement = d_warp(shape, scale, offset, zoom)
+                        frequency = 1.0
+                    x, y = apply_warp(
+                        displacement, shape, scale, offset, zoom, frequency
+                    )
+                    if with_gradient:
+                        return noise_and_gradient(x, y, shape, scale, zoom)
+                    return generate_noise(x, y)
+
+                def fractal():
+                    if with_gradient:
+                        noise, dx, dy = generate_fractal(
+                            warp_and_noise,
+                            shape,
+                            scale,
+                            offset,
+                            zoom,
+                            derivatives=True,
+                        )
+                        return noise, (dx, dy)
+                    if not progressive:
+                        noise = generate_fractal(
+                            warp_and_noise, shape, scale, offset, zoom
+                        )
+                        return noise, None
+
+                    # Show every coarser level while the finer ones are computed
+                    _, params = generate_fractal.params()
+                    for level in generate_progressive_fractal_noise(
+                        warp_and_noise,
+                        shape,
+                        scale,
+                        offset,
+                        zoom,
+                        params["octaves"],
+                        params["persistence"],
+                        params["lacunarity"],
+                    ):
+                        if level.shape != tuple(shape):
+                            token.publish(
+                                (level, level * terrain_scale, None, None, None)
+                            )
+                    return level, None
+
+                noise_key = cache.key(
+                    "fractal",
+                    warp_key,
+                    generate_noise.params(),
+                    generate_fractal.params(),
+                    is_hoisted,
+                    progressive,
+                    with_gradient,
+                )
+                noise, gradient = cache.get(noise_key, fractal)
+            else:
+                warp_key = cache.key("warp", None, d_warp.params(), view)
+                displacement = cache.get(
+                    warp_key, lambda: d_warp(shape, scale, offset, zoom)
+                )
 
-            def warp_and_noise(shape=shape, scale=scale, offset=offset, zoom=zoom):
-                x, y = d_warp(shape, scale, offset, zoom)
-                return generate_noise(x, y)
+                def warp_and_noise():
+                    token.check()
+                    x, y = apply_warp(displacement, shape, scale, offset, zoom)
+                    if with_gradient:
+                        noise, dx, dy = noise_and_gradient(x, y, shape, scale, zoom)
+                        return noise, (dx, dy)
+                    return generate_noise(x, y), None
 
-            noise = generate_fractal(warp_and_noise, shape, scale, offset, zoom)
-        else:
-            x, y = d_warp(shape, scale, offset, zoom)
-            noise = generate_noise(x, y)
+                noise_key = cache.key(
+                    "noise", warp_key, generate_noise.params(), with_gradient
+                )
+                noise, gradient = cache.get(noise_key, warp_and_noise)
 
-        size = noise.shape
+            token.check()
 
-        tmpfile = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
-        norm = (noise + 1) / 2
-        img = Image.fromarray(np.uint8(norm * 255))
-        img.save(tmpfile.name)
+            if is_styled:
+                return noise, None, None, None, None
 
-        if is_style_transfer_enabled.value():
-            if content_path_val.value() == "Custom":
-                content_path = tmpfile.name
+            terrain, terrain_key = noise, noise_key
+            # Erosion runs on the carved rivers and droplet erosion is fed their
+            # drainage, so the eroded channels follow the drainage network
+            drainage = None
+            if with_rivers:
+                drainage = cache.get(
+                    cache.key("drainage", terrain_key),
+                    lambda: analyze_drainage(terrain),
+                )
+                token.check()
+                terrain_key = cache.key("rivers", terrain_key, carve_rivers.params())
+                terrain = cache.get(
+                    terrain_key,
+                    lambda: carve_rivers(terrain.copy(), drainage=drainage),
+                )
+                token.check()
+                # The noise gradient does not describe the riverbeds
+                gradient = None
+
+            if is_eroded:
+                terrain_key = cache.key("erosion", terrain_key, apply_erosion.params())
+
+                def erode():
+                    # Long simulations stop early once cancelled, so check before
+                    # the partial result gets cached
+                    kwargs = {}
+                    if "should_stop" in apply_erosion.defaults:
+                        kwargs["should_stop"] = token.cancelled
+                    if "gradient" in apply_erosion.defaults:
+                        kwargs["gradient"] = gradient
+                    if "flow" in apply_erosion.defaults and drainage is not None:
+                        kwargs["flow"] = drainage[2]
+                    result = apply_erosion(terrain.copy(), **kwargs)
+                    token.check()
+                    return result
+
+                terrain = cache.get(terrain_key, erode)
+
+            eroded = terrain
+            terrain_key = cache.key("scale", terrain_key, terrain_scale)
+            terrain = cache.get(terrain_key, lambda: eroded * terrain_scale)
+
+            # Eroded heights no longer match the noise gradient either
+            if not is_bare:
+                gradient = None
+            if gradient is not None:
+                gradient = cache.get(
+                    cache.key("scaled gradient", terrain_key),
+                    lambda: tuple(g * terrain_scale for g in gradient),
+                )
+
+            tree_mesh = None
+            if with_trees:
+                token.check()
+                density_key = cache.key("tree density", terrain_key)
+                tree_density = cache.get(
+                    density_key,
+                    lambda: generate_tree_density(terrain, gradient=gradient),
+                )
+                token.check()
+                tree_mesh = cache.get(
+                    cache.key("tree mesh", density_key),
+                    lambda: build_tree_mesh(terrain, tree_density),
+                )
+
+            lods = None
+            if terrain.size >= LOD_MIN_SIZE:
+                token.check()
+                lods = cache.get(
+                    cache.key("lod", terrain_key),
+                    lambda: build_lod_meshes(terrain),
+                )
+            return noise, terrain, gradient, tree_mesh, lods
+
+        def generate(token):
+            if is_progressive:
+                return run_pipeline(token, shape, with_trees, progressive=True)
+            if low_shape is not None:
+                token.publish(run_pipeline(token, low_shape, False))
+            return run_pipeline(token, shape, with_trees)
+
+        # Applied on the GUI thread once the latest generation finishes
+        def apply_result(result):
+            noise, terrain, gradient, tree_mesh, lods = result
+
+            size = noise.shape
+
+            if is_styled:
+                plotter.clear()
+                tmpfile = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
+                norm = (noise + 1) / 2
+                img = Image.fromarray(np.uint8(norm * 255))
+                img.save(tmpfile.name)
+
+                if content_path_val.value() == "Custom":
+                    content_path = tmpfile.name
+                else:
+                    content_path = content_path_val.value()
+                # insert preview & progress placeholders in graph area
+                graph_widget = app.graph
+                plotter.hide()
+                # prepare widgets
+                content_lbl = QLabel()
+                content_title = QLabel("Content")
+                style_lbl = QLabel()
+                style_title = QLabel("Style")
+                progress = QProgressBar()
+                progress.setRange(0, 100)
+                progress_title = QLabel("Progress")
+                # load thumbnails
+                pix = QPixmap(content_path).scaled(200, 200, Qt.KeepAspectRatio)
+                content_lbl.setPixmap(pix)
+                pix2 = QPixmap(style_path_val.value()).scaled(
+                    200, 200, Qt.KeepAspectRatio
+                )
+                style_lbl.setPixmap(pix2)
+                # container layout:
+                placeholder = QWidget()
+                ph_vlay = QVBoxLayout()
+                # top row: two images side by side
+                top_row = QHBoxLayout()
+                # content column
+                content_v = QVBoxLayout()
+                content_lbl.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+                content_title.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+                content_v.addWidget(content_lbl)
+                content_v.addWidget(content_title)
+                content_v.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+                # style column
+                style_v = QVBoxLayout()
+                style_lbl.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+                style_title.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+                style_v.addWidget(style_lbl)
+                style_v.addWidget(style_title)
+                style_v.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+                top_row.addLayout(content_v)
+                top_row.addLayout(style_v)
+                top_row.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+                ph_vlay.addLayout(top_row)
+                # progress row
+                prog_v = QVBoxLayout()
+                progress.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+                progress_title.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+                prog_v.addWidget(progress)
+                prog_v.addWidget(progress_title)
+                prog_v.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+                ph_vlay.addLayout(prog_v)
+                ph_vlay.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+                placeholder.setLayout(ph_vlay)
+                graph_widget.layout.addWidget(placeholder)
+                graph_widget._placeholders = [placeholder]
+
+                worker = StyleWorker(
+                    content_path,
+                    style_path_val.value(),
+                    terrain_scale,
+                    iterations_val.value(),
+                    style_weight_val.value(),
+                    content_weight_val.value(),
+                    tv_weight_val.value(),
+                )
+                worker.progress.connect(progress.setValue, Qt.QueuedConnection)
+
+                # on style result: remove placeholders, restore plotter and render
+                def handle_style_result(terrain_map):
+                    # remove placeholder container
+                    ph = graph_widget._placeholders[0]
+                    graph_widget.layout.removeWidget(ph)
+                    ph.deleteLater()
+                    plotter.show()
+
+                    terrain_map = downsample_to_size(terrain_map, size)
+                    noise_mdn = np.median(noise)
+                    terrain_map += noise_mdn - np.median(terrain_map)
+
+                    if with_rivers:
+                        terrain_map = carve_rivers(terrain_map)
+                    if is_eroded:
+                        terrain_map = apply_erosion(terrain_map)
+
+                    terrain_map *= terrain_scale
+                    # Named like every other terrain so the next one replaces it
+                    plot_terrain(plotter, terrain_map, show=False, name="terrain")
+                    if with_trees:
+                        tree_density = generate_tree_density(terrain_map)
+
+                        visualize_terrain_with_trees(
+                            plotter,
+                            terrain_map,
+                            tree_density,
+                        )
+                    else:
+                        add_tree_mesh(plotter, None)
+
+                worker.result_ready.connect(handle_style_result, Qt.QueuedConnection)
+                thread = QThread()
+                worker.moveToThread(thread)
+                thread.started.connect(worker.run)
+                worker.finished.connect(thread.quit)
+                console._worker = worker
+                console._thread = thread
+                thread.finished.connect(worker.deleteLater)
+                thread.finished.connect(thread.deleteLater)
+                thread.start()
             else:
-                content_path = content_path_val.value()
-            # insert preview & progress placeholders in graph area
-            graph_widget = app.graph
-            plotter.hide()
-            # prepare widgets
-            content_lbl = QLabel()
-            content_title = QLabel("Content")
-            style_lbl = QLabel()
-            style_title = QLabel("Style")
-            progress = QProgressBar()
-            progress.setRange(0, 100)
-            progress_title = QLabel("Progress")
-            # load thumbnails
-            pix = QPixmap(content_path).scaled(200, 200, Qt.KeepAspectRatio)
-            content_lbl.setPixmap(pix)
-            pix2 = QPixmap(style_path_val.value()).scaled(200, 200, Qt.KeepAspectRatio)
-            style_lbl.setPixmap(pix2)
-            # container layout:
-            placeholder = QWidget()
-            ph_vlay = QVBoxLayout()
-            # top row: two images side by side
-            top_row = QHBoxLayout()
-            # content column
-            content_v = QVBoxLayout()
-            content_lbl.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-            content_title.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-            content_v.addWidget(content_lbl)
-            content_v.addWidget(content_title)
-            content_v.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-            # style column
-            style_v = QVBoxLayout()
-            style_lbl.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-            style_title.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-            style_v.addWidget(style_lbl)
-            style_v.addWidget(style_title)
-            style_v.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-            top_row.addLayout(content_v)
-            top_row.addLayout(style_v)
-            top_row.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-            ph_vlay.addLayout(top_row)
-            # progress row
-            prog_v = QVBoxLayout()
-            progress.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-            progress_title.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-            prog_v.addWidget(progress)
-            prog_v.addWidget(progress_title)
-            prog_v.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-            ph_vlay.addLayout(prog_v)
-            ph_vlay.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-            placeholder.setLayout(ph_vlay)
-            graph_widget.layout.addWidget(placeholder)
-            graph_widget._placeholders = [placeholder]
-
-            worker = StyleWorker(
-                content_path,
-                style_path_val.value(),
-                height_scale.value(),
-                iterations_val.value(),
-                style_weight_val.value(),
-                content_weight_val.value(),
-                tv_weight_val.value(),
-            )
-            worker.progress.connect(progress.setValue, Qt.QueuedConnection)
-
-            # on style result: remove placeholders, restore plotter and render
-            def handle_style_result(terrain_map):
-                # remove placeholder container
-                ph = graph_widget._placeholders[0]
-                graph_widget.layout.removeWidget(ph)
-                ph.deleteLater()
-                plotter.show()
-
-                terrain_map = downsample_to_size(terrain_map, size)
-                noise_mdn = np.median(noise)
-                terrain_map += noise_mdn - np.median(terrain_map)
-
-                if is_erosion_enabled.value():
-                    terrain_map = apply_erosion(terrain_map)
-
-                terrain_map *= height_scale.value()
-                plot_terrain(plotter, terrain_map, show=False)
-                if is_tree_enabled.value():
-                    tree_density = generate_tree_density(terrain_map, len(terrain_map))
-
-                    visualize_terrain_with_trees(
-                        plotter,
-                        terrain_map,
-                        tree_density,
+                spacing = shape[1] / terrain.shape[1]
+                if lods is not None:
+                    app.graph.show_lods(lods)
+                else:
+                    update_terrain(plotter, terrain, gradient=gradient, spacing=spacing)
+                add_tree_mesh(plotter, tree_mesh)
+
+            plotter.render()
+
+        def generate_chunk(window):
+            # Windows sample the same coordinates as the full grid, so the
+            # chunks of the world join seamlessly
+            if is_fractal:
+                base_scale = scale / zoom
+                displacement = d_warp(shape, base_scale, offset, zoom, window=window)
+
+                def warp_and_noise(scale=scale, offset=offset, window=window):
+                    frequency = scale / base_scale
+                    x, y = apply_warp(
+                        displacement, shape, scale, offset, zoom, frequency, window
                     )
+                    return generate_noise(x, y)
 
-            worker.result_ready.connect(handle_style_result, Qt.QueuedConnection)
-            thread = QThread()
-            worker.moveToThread(thread)
-            thread.started.connect(worker.run)
-            worker.finished.connect(thread.quit)
-            console._worker = worker
-            console._thread = thread
-            thread.finished.connect(worker.deleteLater)
-            thread.finished.connect(thread.deleteLater)
-            thread.start()
-        else:
-            terrain = noise
-            if is_erosion_enabled.value():
-                terrain = apply_erosion(terrain)
-
-            terrain = terrain * height_scale.value()
-            plot_terrain(plotter, terrain, show=False)
-
-            if is_tree_enabled.value():
-                tree_density = generate_tree_density(terrain, len(terrain))
-
-                visualize_terrain_with_trees(
-                    plotter,
-                    terrain,
-                    tree_density,
+                noise = generate_fractal(
+                    warp_and_noise, shape, scale, offset, zoom, window=window
                 )
-
-        plotter.render()
+            else:
+                displacement = d_warp(shape, scale, offset, zoom, window=window)
+                x, y = apply_warp(
+                    displacement, shape, scale, offset, zoom, window=window
+                )
+                noise = generate_noise(x, y)
+            return noise * terrain_scale
+
+        # Streamed worlds replace the terrain with noise chunks around the
+        # camera; erosion, rivers and trees need the whole map and are skipped
+        if is_streamed.value() and not is_styled:
+            generator.cancel()
+            plotter.remove_actor("terrain", render=False)
+            add_tree_mesh(plotter, None)
+            chunks.reset(generate_chunk, height_range=(-terrain_scale, terrain_scale))
+            chunks.update(plotter.camera.position)
+            plotter.render()
+            return
+
+        chunks.clear()
+        generator.submit(generate, apply_result)
 
     return update_plotter
 
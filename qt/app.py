@@ -1,7 +1,10 @@
+import numpy as np
 from PyQt6 import QtWidgets
 from PyQt6.QtWidgets import QApplication, QMainWindow, QSizePolicy, QSpacerItem
 from pyvistaqt import QtInteractor
 
+from terrain.visualization.lod import select_lod
+
 from .buttons import Buttons
 from .camera import PathTracker
 from .core import TCore
@@ -136,5 +139,55 @@ class TerrainGraph(QtWidgets.QWidget):
         self.plotter = QtInteractor()
         self.layout.addWidget(self.plotter.interactor)
 
+        # Levels of detail of the terrain, swapped before every render
+        self.lods = []
+        self.lod_actor = None
+        self.lod_level = None
+        self.plotter.ren_win.AddObserver("StartEvent", self.update_lod)
+
     def get_plotter(self):
         return self.plotter
+
+    def show_lods(self, lods, name="terrain"):
+        """
+        Show a terrain as (max_error, mesh) levels of detail, finest first,
+        from build_lod_meshes. The level shown follows the camera distance.
+        """
+        finest = lods[0][1]
+        self.lods = lods
+        self.lod_level = 0
+        self.lod_actor = self.plotter.add_mesh(
+            finest,
+            scalars="Data",
+            clim=finest.get_data_range("Data"),
+            show_edges=False,
+            cmap="terrain",
+            name=name,
+        )
+        self.update_lod()
+
+    def update_lod(self, *args):
+        """
+        Switch to the coarsest level whose error stays below a pixel as seen
+        from the point of the terrain closest to the camera.
+        """
+        actor = self.lod_actor
+        if actor is None:
+            return
+        if actor not in self.plotter.actors.values():
+            # The terrain was replaced, e.g. by update_terrain
+            self.lods, self.lod_actor = [], None
+            return
+        camera = self.plotter.camera
+        bounds = np.reshape(self.lods[0][1].bounds, (3, 2))
+        position = np.array(camera.position)
+        nearest = np.clip(position, bounds[:, 0], bounds[:, 1])
+        level = select_lod(
+            [error for error, _ in self.lods],
+            np.linalg.norm(position - nearest),
+            camera.view_angle,
+            self.plotter.window_size[1],
+        )
+        if level != self.lod_level:
+            self.lod_level = level
+            actor.mapper.SetInputData(self.lods[level][1])
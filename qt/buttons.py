@@ -27,7 +27,7 @@ class PlayButton(QPushButton):
 
         else:
             self.setIcon(QIcon(":/icons/play.png"))
-            self.tracked_slider.anim.stop()
+            self.tracked_slider.stop()
             self.play = 1
 
 
@@ -1,7 +1,15 @@
 import numpy as np
-from PyQt6.QtCore import QPropertyAnimation, Qt
+from PyQt6.QtCore import QElapsedTimer, Qt, QTimer, pyqtSignal
 from PyQt6.QtWidgets import QSlider
 
+from .tracks import arc_length_spline
+
+# Interval of the animation and render timers, one display frame at 60 Hz
+FRAME_MS = 16
+
+# Equal arc length samples of the camera track, interpolated between
+TRACK_SAMPLES = 4096
+
 
 def get_angle(v0, v1):
     cos_theta = np.dot(v0, v1) / (np.linalg.norm(v0) * np.linalg.norm(v1))
@@ -16,6 +24,9 @@ def get_angle(v0, v1):
 
 
 class PathTracker(QSlider):
+    # Fractional slider position, emitted once per animation frame
+    frame = pyqtSignal(float)
+
     def __init__(self):
         super().__init__()
 
@@ -25,8 +36,16 @@ class PathTracker(QSlider):
         self.setMinimum(self.min)
         self.setMaximum(self.max)
         self.setOrientation(Qt.Orientation.Horizontal)
-        self.anim = QPropertyAnimation(self, b"value")
-        self.anim.finished.connect(self.on_animation_finished)
+        self.valueChanged.connect(self.set_position)
+
+        # The animation is driven by wall clock time sampled by a frame timer
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.setInterval(FRAME_MS)
+        self.timer.timeout.connect(self.advance)
+        self.clock = QElapsedTimer()
+        self.anim_start = self.position
+        self.anim_duration = 0
         self.loop_strategy = {
             "Loop": self.loop,
             "Reverse": self.reverse,
@@ -38,9 +57,7 @@ class PathTracker(QSlider):
 
     def track_path(self, path):
         self.track = path
-        self.track_length = sum(
-            [np.linalg.norm(path[i + 1] - path[i]) for i in range(len(path) - 1)]
-        )
+        self.track_length = np.linalg.norm(np.diff(path, axis=0), axis=1).sum()
         self.anim_time = int(4 * self.track_length)
 
     def disconnect(self):
@@ -50,14 +67,20 @@ class PathTracker(QSlider):
         self.start = self.min
         self.end = self.max
         self.reversed = False
+        self.position = float(self.min)
         self.setSliderPosition(self.min)
         self.track = None
 
+    def set_position(self, value):
+        self.position = float(value)
+
     def reverse(self):
         self.start = self.max - self.start
         self.end = self.max - self.end
         self.reversed = not self.reversed
         self.setSliderPosition(self.sliderPosition())
+        if self.timer.isActive():
+            self.animate()
 
     def loop(self):
         self.setSliderPosition(self.start)
@@ -67,14 +90,34 @@ class PathTracker(QSlider):
 
     def animate(self):
         if self.can_animate():
-            percentage = self.sliderPosition() / (self.max - self.min)
-            time = int(self.anim_time * (1 - percentage))
-            if self.reversed:
-                time = int(self.anim_time * percentage)
-            self.anim.setDuration(time)
-            self.anim.setStartValue(self.sliderPosition())
-            self.anim.setEndValue(self.end)
-            self.anim.start()
+            self.anim_start = self.position
+            distance = abs(self.end - self.position) / (self.max - self.min)
+            self.anim_duration = self.anim_time * distance
+            self.clock.start()
+            self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+
+    def advance(self):
+        """
+        Move to where the animation should be by now, so frames that took too
+        long to render are dropped instead of slowing down the flight
+        """
+        t = 1.0
+        if self.anim_duration > 0:
+            t = min(self.clock.elapsed() / self.anim_duration, 1.0)
+        self.position = self.anim_start + t * (self.end - self.anim_start)
+
+        # The fractional position is reported by frame, not valueChanged
+        self.blockSignals(True)
+        self.setValue(round(self.position))
+        self.blockSignals(False)
+        self.frame.emit(self.position)
+
+        if t >= 1.0:
+            self.timer.stop()
+            self.on_animation_finished()
 
     def on_animation_finished(self):
         self.handle_loop()
@@ -82,6 +125,16 @@ class PathTracker(QSlider):
 
 
 class Camera:
+    def __init__(self):
+        self.chunks = None
+        self.lookahead = 4
+        self.track = None
+
+        # Camera moves are merged and rendered at most once per frame
+        self.frame_timer = QTimer()
+        self.frame_timer.setSingleShot(True)
+        self.frame_timer.timeout.connect(self.render_frame)
+        self.frame_clock = QElapsedTimer()
 
     def set_plotter(self, plotter):
         self.plotter = plotter
@@ -97,10 +150,10 @@ class Camera:
 
         self.reverse_button.clicked.connect(self.slider.reverse)
         self.reverse_button.clicked.connect(self.reverse_path)
-        self.reverse_button.clicked.connect(self.follow_path)
+        self.reverse_button.clicked.connect(self.request_frame)
 
-        self.slider.sliderMoved.connect(self.follow_path)
-        self.slider.valueChanged.connect(self.follow_path)
+        self.slider.valueChanged.connect(self.request_frame)
+        self.slider.frame.connect(self.request_frame)
 
     def reset(self):
         self.slider.reset()
@@ -118,12 +171,13 @@ class Camera:
         self.reverse_button.show()
 
     def track_path(self, path):
-        self.track = path
-        path_lengths = np.linalg.norm(self.track[:-1] - self.track[1:], axis=1)
-        self.clen = np.cumsum(path_lengths)
-        self.slider.track_path(path)
+        # The camera moves along a spline through the path at constant speed,
+        # with the position and view-up of every sample computed at once
+        self.track, self.arc = arc_length_spline(path, TRACK_SAMPLES)
+        self.track_length = self.arc[-1]
+        self.slider.track_path(self.track)
 
-        view_dir = np.array(path) - self.focal_point
+        view_dir = self.track - self.focal_point
         view_dir /= np.linalg.norm(view_dir, axis=1, keepdims=True)
 
         rot = np.array([[0, 1, 0], [-1, 0, 0], [0, 0, 0]])
@@ -137,42 +191,81 @@ class Camera:
         view_up /= np.linalg.norm(view_up, axis=1, keepdims=True)
         self.view_up = -view_up
 
+    def stream_chunks(self, chunks, lookahead=4):
+        """
+        Stream terrain chunks around the camera and up to lookahead chunk
+        lengths ahead of it while it follows the track
+        """
+        self.chunks = chunks
+        self.lookahead = lookahead
+
+    def points_ahead(self, dist):
+        """
+        Track points every half chunk up to lookahead chunks past the arc
+        length dist, wrapping around closed tracks
+        """
+        step = self.chunks.chunk_length() / 2
+        ahead = dist + step * np.arange(1, 2 * self.lookahead + 1)
+        if np.allclose(self.track[0], self.track[-1]):
+            ahead %= self.track_length
+        else:
+            ahead = ahead[ahead <= self.track_length]
+        return np.column_stack(
+            [np.interp(ahead, self.arc, axis) for axis in self.track.T]
+        )
+
     def reverse_path(self):
         self.track = self.track[::-1]
+        self.view_up = self.view_up[::-1]
 
     def disconnect(self):
         self.track = None
         self.slider.disconnect()
 
-    def follow_path(self):
-
-        if len(self.track) != 0:
-            path_length = self.clen[-1]
-
-            percent = self.slider.sliderPosition() / self.slider.max
-            if self.slider.reversed:
-                percent = 1 - percent
-
-            dist = percent * path_length
-
-            iter = np.searchsorted(self.clen, dist)
-
-            curr_dist = self.clen[iter - 1] if iter > 0 else 0
+    def request_frame(self, *args):
+        """
+        Schedule moving the camera to the slider position. Requests within a
+        frame are merged, and a frame starts no sooner than FRAME_MS after the
+        previous one, so slider and animation updates render at most once per
+        display frame.
+        """
+        if self.frame_timer.isActive():
+            return
+        wait = 0
+        if self.frame_clock.isValid():
+            wait = max(0, FRAME_MS - self.frame_clock.elapsed())
+        self.frame_timer.start(wait)
+
+    def render_frame(self):
+        self.frame_clock.start()
+        self.follow_path()
+        self.plotter.render()
 
-            start = self.track[iter]
-            end = self.track[iter + 1]
-            vec = end - start
-
-            vec_dist = np.linalg.norm(vec)
-            p = (dist - curr_dist) / vec_dist
-
-            c_pos = p * vec + start
-
-            viewup = self.view_up[iter] + p * (
-                self.view_up[iter + 1] - self.view_up[iter]
-            )
-            viewup = viewup / np.linalg.norm(viewup)
-
-            new_position = (c_pos[0], c_pos[1], c_pos[2])
-            self.plotter.set_position(new_position)
-            self.plotter.set_viewup(viewup)
+    def follow_path(self):
+        """
+        Move the camera to the slider position on the track without rendering
+        """
+        if self.track is None or len(self.track) < 2:
+            return
+
+        percent = self.slider.position / self.slider.max
+        if self.slider.reversed:
+            percent = 1 - percent
+        dist = percent * self.track_length
+
+        # Samples are equally spaced along the track
+        sample = percent * (len(self.track) - 1)
+        i = min(int(sample), len(self.track) - 2)
+        p = sample - i
+
+        c_pos = self.track[i] + p * (self.track[i + 1] - self.track[i])
+        viewup = self.view_up[i] + p * (self.view_up[i + 1] - self.view_up[i])
+        viewup = viewup / np.linalg.norm(viewup)
+
+        # The plotter's set_viewup renders while resetting the camera even
+        # with render=False, its renderer's does not
+        self.plotter.set_position(c_pos, render=False)
+        self.plotter.renderer.set_viewup(viewup, render=False)
+
+        if self.chunks is not None:
+            self.chunks.update(c_pos, self.points_ahead(dist))
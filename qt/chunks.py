@@ -0,0 +1,183 @@
+import traceback
+
+import numpy as np
+from PyQt6.QtCore import QObject, Qt, QThreadPool
+
+from terrain.visualization.pyvista_vis import plot_terrain
+
+from .worker import CancelToken, GenerationJob
+
+
+class ChunkManager(QObject):
+    """
+    Streams square terrain chunks in and out of a plotter as the camera moves.
+
+    The world is divided into chunks of chunk_size cells of the sample lattice
+    of a generator, which returns the heights of any window of it. Chunks
+    around the camera and along the track ahead of it are generated on a pool
+    thread and added as actors once ready, nearest first. At most budget
+    chunks are resident or being generated; chunks that are no longer wanted
+    are evicted, farthest from the camera first, only to make room for new
+    ones.
+    """
+
+    def __init__(self, plotter, chunk_size=128, budget=32, radius=1, workers=2):
+        super().__init__()
+        self.plotter = plotter
+        self.chunk_size = chunk_size
+        self.budget = budget
+        # Chunks around every point of the track that are kept
+        self.radius = radius
+
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(workers)
+        self.generate = None
+        self.spacing = 1.0
+        self.height_range = None
+        # Chunk (row, col) index to the name of its actor
+        self.resident = {}
+        # Chunk index to its token and job, and the token back to the chunk
+        self.pending = {}
+        self.tokens = {}
+
+    def reset(self, generate, spacing=1.0, height_range=None):
+        """
+        Drop all chunks and stream new ones from generate(window), which
+        returns the heights of the ((row_start, row_stop), (col_start,
+        col_stop)) window of its sample lattice, spaced by spacing. All
+        chunks share the colors of height_range, e.g. the range of the noise.
+        """
+        self.clear()
+        self.generate = generate
+        self.spacing = spacing
+        self.height_range = height_range
+
+    def clear(self):
+        """
+        Cancel the chunks being generated and remove all chunk actors.
+        """
+        for key in list(self.pending):
+            self.cancel(key)
+        for key in list(self.resident):
+            self.evict(key)
+        self.generate = None
+
+    def chunk_length(self):
+        return self.chunk_size * self.spacing
+
+    def chunks_near(self, points):
+        """
+        Chunk indices within radius of the (x, y) points, in the order the
+        points first reach them.
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=float))[:, :2]
+        centers = np.floor(points / self.chunk_length()).astype(int)[:, ::-1]
+        steps = np.arange(-self.radius, self.radius + 1)
+        offsets = np.stack(np.meshgrid(steps, steps, indexing="ij"), axis=-1)
+        # Nearest neighbours of every point first
+        offsets = offsets.reshape(-1, 2)
+        offsets = offsets[np.argsort(np.abs(offsets).max(axis=1), kind="stable")]
+        keys = (centers[:, None] + offsets).reshape(-1, 2)
+        _, first = np.unique(keys, axis=0, return_index=True)
+        return [tuple(key) for key in keys[np.sort(first)]]
+
+    def distance(self, key, position):
+        """
+        Distance from an (x, y) position to the center of a chunk.
+        """
+        center = (np.array(key[::-1]) + 0.5) * self.chunk_length()
+        return np.linalg.norm(center - np.asarray(position)[:2])
+
+    def update(self, position, ahead=()):
+        """
+        Stream the chunks around the camera position and the track points
+        ahead of it, ordered from near to far.
+        """
+        if self.generate is None:
+            return
+        points = [np.asarray(position)[:2]] + [np.asarray(p)[:2] for p in ahead]
+        wanted = self.chunks_near(points)[: self.budget]
+        wanted_set = set(wanted)
+
+        # Prefetches the camera turned away from are no longer worth finishing
+        for key in list(self.pending):
+            if key not in wanted_set:
+                self.cancel(key)
+
+        missing = [
+            key
+            for key in wanted
+            if key not in self.resident and key not in self.pending
+        ]
+        room = self.budget - len(self.resident) - len(self.pending)
+        unwanted = [key for key in self.resident if key not in wanted_set]
+        unwanted.sort(key=lambda key: self.distance(key, position))
+        while room < len(missing) and unwanted:
+            self.evict(unwanted.pop())
+            room += 1
+
+        for rank, key in enumerate(missing[:room]):
+            self.submit(key, priority=len(missing) - rank)
+
+    def window(self, key):
+        """
+        Sample window of a chunk, one sample wider so neighbours share edges.
+        """
+        row, col = key
+        size = self.chunk_size
+        return (row * size, (row + 1) * size + 1), (col * size, (col + 1) * size + 1)
+
+    def submit(self, key, priority=0):
+        generate, window = self.generate, self.window(key)
+
+        def run(token):
+            token.check()
+            return generate(window)
+
+        token = CancelToken()
+        job = GenerationJob(run, token)
+        job.signals.result_ready.connect(
+            self.handle_result, Qt.ConnectionType.QueuedConnection
+        )
+        job.signals.failed.connect(
+            self.handle_failure, Qt.ConnectionType.QueuedConnection
+        )
+        self.pending[key] = (token, job)
+        self.tokens[token] = key
+        self.pool.start(job, priority)
+
+    def cancel(self, key):
+        token, job = self.pending.pop(key)
+        del self.tokens[token]
+        token.cancel()
+        self.pool.tryTake(job)
+
+    def evict(self, key):
+        self.plotter.remove_actor(self.resident.pop(key), render=False)
+
+    def handle_result(self, token, heights):
+        key = self.tokens.pop(token, None)
+        if key is None or token.cancelled():
+            return
+        del self.pending[key]
+
+        name = f"chunk {key[0]} {key[1]}"
+        origin = (key[1] * self.chunk_length(), key[0] * self.chunk_length())
+        plot_terrain(
+            self.plotter,
+            heights,
+            show=False,
+            spacing=self.spacing,
+            name=name,
+            origin=origin,
+        )
+        if self.height_range is not None:
+            self.plotter.actors[name].mapper.scalar_range = self.height_range
+        self.resident[key] = name
+        self.plotter.render()
+
+    def handle_failure(self, token, error):
+        key = self.tokens.pop(token, None)
+        if key is not None:
+            del self.pending[key]
+        traceback.print_exception(error)
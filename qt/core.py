@@ -1,4 +1,12 @@
+import traceback
+
+from PyQt6.QtCore import QTimer
+
 from .camera import Camera
+from .tree import parameter_changes
+
+# Quiet period after the last parameter edit before a live preview starts
+PREVIEW_DELAY_MS = 250
 
 
 class TCore:
@@ -13,11 +21,39 @@ class TCore:
         self.camera.connect(self.console.slider, self.console.buttons.buttons)
         self.camera.set_plotter(self.display.get_plotter())
 
+        # Parameter edits are coalesced until they stop for PREVIEW_DELAY_MS
+        self.changed = set()
+        self.preview_timer = QTimer()
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(PREVIEW_DELAY_MS)
+        self.preview_timer.timeout.connect(self.handle_preview)
+        parameter_changes().changed.connect(self.schedule_preview)
+
     def track_path(self, path):
         self.camera.track_path(path)
 
     def handle_update(self):
         self.update_plotter()
+        # Widgets registered during the update may report their initial values
+        self.preview_timer.stop()
+        self.changed.clear()
+
+    def schedule_preview(self, name):
+        self.changed.add(name)
+        self.preview_timer.start()
+
+    def handle_preview(self):
+        changed, self.changed = self.changed, set()
+        # An exception escaping a timer slot would abort the application, a
+        # failed preview is reported and the next edit tries again
+        try:
+            self.update_plotter(changed=changed)
+        except Exception:
+            traceback.print_exc()
 
     def on_update(self, fun):
+        """
+        fun() regenerates everything, fun(changed=names) is a live preview after
+        the named parameters were edited
+        """
         self.update_plotter = fun
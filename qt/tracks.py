@@ -1,4 +1,5 @@
 import numpy as np
+from scipy.interpolate import CubicSpline
 
 
 def circle_track(origin, radius):
@@ -15,3 +16,28 @@ def circle_track(origin, radius):
     # Combine x, y, z into a 3D array (each point as (x, y, z))
     circle_points = np.vstack((x, y, z)).T
     return circle_points
+
+
+def arc_length_spline(path, samples=None, oversample=8):
+    """
+    Fit a cubic spline through the points of a track and resample it at equal
+    arc length, so the camera moves at constant speed however unevenly the
+    points are spaced. Closed tracks, ending where they start, get a periodic
+    spline. Returns the (samples, 3) points and their distance along the track.
+    """
+    path = np.asarray(path, dtype=float)
+    chord = np.linalg.norm(np.diff(path, axis=0), axis=1)
+    # Repeated points would give the spline parameter a zero length step
+    path = path[np.concatenate([[True], chord > 0])]
+    closed = len(path) > 2 and np.allclose(path[0], path[-1])
+    if closed:
+        path[-1] = path[0]
+    u = np.concatenate([[0], np.cumsum(chord[chord > 0])])
+    spline = CubicSpline(u, path, bc_type="periodic" if closed else "not-a-knot")
+
+    # Arc length of a dense polyline along the spline, inverted by interpolation
+    fine = np.linspace(0, u[-1], oversample * len(u))
+    steps = np.linalg.norm(np.diff(spline(fine), axis=0), axis=1)
+    fine_arc = np.concatenate([[0], np.cumsum(steps)])
+    arc = np.linspace(0, fine_arc[-1], samples or len(path))
+    return spline(np.interp(arc, fine_arc, fine)), arc
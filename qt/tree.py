@@ -3,20 +3,52 @@ import inspect
 import uuid
 
 from PyQt6 import QtWidgets
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import QObject, Qt, pyqtSignal
 from PyQt6.QtGui import QPixmap
 from PyQt6.QtWidgets import QCheckBox, QComboBox, QHBoxLayout, QLabel, QLineEdit
 
 
+class ParameterChanges(QObject):
+    """
+    Reports the name of every parameter edited in any parameter tree
+    """
+
+    changed = pyqtSignal(str)
+
+
+_parameter_changes = None
+
+
+def parameter_changes():
+    """
+    The ParameterChanges instance shared by all parameter trees
+    """
+    global _parameter_changes
+    if _parameter_changes is None:
+        _parameter_changes = ParameterChanges()
+    return _parameter_changes
+
+
 class PTGroup:
     """
     Defines a group of either values or functions in a parameter tree.
     Each object maintains its state which updates upon a signal from the tree.
+    Edits are reported to parameter_changes() under the registered name, or
+    under the scope name for groups nested in an option.
     """
 
-    def __init__(self, tree):
+    def __init__(self, tree, scope=None):
         self.tree = tree
         self.cache = {}
+        self.scope = scope
+
+    def connect(self, signal, slot, name):
+        """
+        Connect the signal to slot, then report the change by name
+        """
+        name = self.scope or name
+        signal.connect(slot)
+        signal.connect(lambda *_: parameter_changes().changed.emit(name))
 
     def register_value(self, name, val, show=True):
         identifier = f"{name}_{self.tree.id}"
@@ -28,7 +60,7 @@ class PTGroup:
         signal = self.tree.push(entry, show=show)
         ret_val = PTValue(val)
         if signal:
-            signal.connect(ret_val.set_value)
+            self.connect(signal, ret_val.set_value, name)
 
         self.cache[identifier] = ret_val
         return ret_val
@@ -61,7 +93,7 @@ class PTGroup:
             signal = ct.push(entry, show=show_param)
             arg = ret_func.defaults[key]
             if signal:
-                signal.connect(arg.set_value)
+                self.connect(signal, arg.set_value, name)
 
         self.cache[identifier] = ret_func
         return ret_func
@@ -73,10 +105,10 @@ class PTGroup:
 
         sub_tree = ParameterTree()
         sub_tree.layout.setContentsMargins(0, 0, 0, 0)
-        opt = PTOption(sub_tree)
+        opt = PTOption(sub_tree, scope=self.scope or name)
 
         signal = sub_tree.push(dict(name=name, default=opt))
-        signal.connect(opt.set_idx)
+        self.connect(signal, opt.set_idx, name)
 
         opt.options = sub_tree.layout.itemAt(0).itemAt(1).widget()
         self.tree.layout.addWidget(sub_tree)
@@ -93,8 +125,8 @@ class PTOption(PTGroup):
     Can error on strings sometimes, it is recommended to pass a PTStatic value.
     """
 
-    def __init__(self, tree):
-        super().__init__(tree)
+    def __init__(self, tree, scope=None):
+        super().__init__(tree, scope=scope)
 
         self.widgets = []
         self.options = []
@@ -107,7 +139,7 @@ class PTOption(PTGroup):
 
         gtree = ParameterTree()
         gtree.layout.setContentsMargins(0, 0, 0, 0)
-        group = PTGroup(gtree)
+        group = PTGroup(gtree, scope=self.scope)
         ret_val = group.register_value(name, val, show=show)
 
         self.widgets.append(gtree)
@@ -127,7 +159,7 @@ class PTOption(PTGroup):
 
         gtree = ParameterTree()
         gtree.layout.setContentsMargins(0, 0, 0, 0)
-        group = PTGroup(gtree)
+        group = PTGroup(gtree, scope=self.scope)
         ret_func = group.register_function(name, func, show=show)
 
         self.widgets.append(gtree)
@@ -168,6 +200,22 @@ class PTCallable:
             else:
                 self.positional_count += 1
 
+    def params(self):
+        """
+        The wrapped function and its current parameter values, e.g. for cache keys
+        """
+        return self.func, {key: self.defaults[key].value() for key in self.defaults}
+
+    def snapshot(self):
+        """
+        A copy with the current parameter values frozen, safe to call off the GUI
+        thread while the user keeps editing the parameters
+        """
+        frozen = PTCallable(self.func)
+        for key in self.defaults:
+            frozen.defaults[key] = PTValue(self.defaults[key].value())
+        return frozen
+
     def __call__(self, *args, **kwargs):
         defaults = {key: self.defaults[key].value() for key in self.defaults}
         nkwargs = {}
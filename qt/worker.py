@@ -0,0 +1,126 @@
+import threading
+import traceback
+
+from PyQt6.QtCore import QObject, QRunnable, Qt, QThreadPool, pyqtSignal
+
+
+class Cancelled(Exception):
+    """
+    Raised inside a job when it has been superseded by a newer one
+    """
+
+
+class CancelToken:
+    """
+    Cooperative cancellation flag shared between the GUI and a job.
+    Jobs call check() between stages to stop early once cancelled, and may
+    publish() intermediate results, e.g. a low resolution preview.
+    """
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.on_publish = None
+
+    def cancel(self):
+        self.event.set()
+
+    def cancelled(self):
+        return self.event.is_set()
+
+    def check(self):
+        if self.event.is_set():
+            raise Cancelled()
+
+    def publish(self, result):
+        self.check()
+        if self.on_publish is not None:
+            self.on_publish(result)
+
+
+class JobSignals(QObject):
+    result_ready = pyqtSignal(object, object)
+    failed = pyqtSignal(object, object)
+
+
+class GenerationJob(QRunnable):
+    """
+    Runs fn(token) on a pool thread and reports its result through signals
+    """
+
+    def __init__(self, fn, token):
+        super().__init__()
+        self.fn = fn
+        self.token = token
+        self.signals = JobSignals()
+        self.token.on_publish = lambda result: self.signals.result_ready.emit(
+            self.token, result
+        )
+
+    def run(self):
+        try:
+            result = self.fn(self.token)
+        except Cancelled:
+            return
+        except Exception as e:
+            self.signals.failed.emit(self.token, e)
+            return
+        if not self.token.cancelled():
+            self.signals.result_ready.emit(self.token, result)
+
+
+class GenerationRunner(QObject):
+    """
+    Runs generation jobs off the GUI thread, one at a time.
+    Intermediate results a job publishes are delivered like its final result.
+
+    Submitting a job cancels the one in flight and drops any queued ones, so
+    only the result of the latest request is delivered. Results are delivered
+    through queued connections, so the callbacks run on the GUI thread.
+    """
+
+    def __init__(self):
+        super().__init__()
+        # A single thread keeps jobs from racing on shared state (e.g. caches);
+        # a superseded job stops at its next check() before the next one starts
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(1)
+        self.token = None
+        self.callbacks = {}
+
+    def submit(self, fn, on_result):
+        """
+        Run fn(token) in the background and call on_result(result) on the GUI
+        thread, unless a newer job is submitted before it finishes.
+        """
+        self.cancel()
+
+        token = CancelToken()
+        self.token = token
+
+        job = GenerationJob(fn, token)
+        job.signals.result_ready.connect(
+            self.handle_result, Qt.ConnectionType.QueuedConnection
+        )
+        job.signals.failed.connect(
+            self.handle_failure, Qt.ConnectionType.QueuedConnection
+        )
+        # The job is deleted after run(), so keep its signals alive until delivery
+        self.callbacks[token] = (on_result, job.signals)
+        self.pool.start(job)
+        return token
+
+    def cancel(self):
+        self.pool.clear()
+        if self.token is not None:
+            self.token.cancel()
+        self.token = None
+        self.callbacks.clear()
+
+    def handle_result(self, token, result):
+        on_result, _ = self.callbacks.get(token, (None, None))
+        if on_result is not None and token is self.token and not token.cancelled():
+            on_result(result)
+
+    def handle_failure(self, token, error):
+        self.callbacks.pop(token, None)
+        traceback.print_exception(error)
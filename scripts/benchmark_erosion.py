@@ -0,0 +1,66 @@
+"""
+Script to report hydraulic erosion throughput (droplets/s) and thermal erosion
+convergence time to track regressions, and to check that hydraulic erosion with
+the default settings keeps heights within the input range on small maps.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from terrain.generation.erosion import add_hydraulic_erosion, add_thermal_erosion
+from terrain.generation.noise import generate_fractal_perlin_noise
+
+SHAPES = [(1024, 1024), (2048, 2048)]
+DROPLETS = 200000
+BATCH_SIZES = [4096, 16384]
+# Small maps where a default batch covers every cell many times
+RANGE_SHAPES = [(100, 100), (128, 128)]
+
+
+def check_range():
+    """Return True if erosion with the defaults stays within the input range."""
+    ok = True
+    for shape in RANGE_SHAPES:
+        terrain = generate_fractal_perlin_noise(shape, scale=4, octaves=6)
+        low, high = terrain.min(), terrain.max()
+        heights = add_hydraulic_erosion(terrain.copy())
+        inside = low <= heights.min() and heights.max() <= high
+        ok &= bool(inside)
+        print(
+            f"{shape[0]}x{shape[1]} defaults: [{heights.min():.3f}, {heights.max():.3f}]"
+            f" within [{low:.3f}, {high:.3f}]: {inside}"
+        )
+    return ok
+
+
+def main():
+    in_range = check_range()
+    droplets = int(sys.argv[1]) if len(sys.argv) > 1 else DROPLETS
+    for shape in SHAPES:
+        terrain = generate_fractal_perlin_noise(shape, scale=4, octaves=6)
+        print(f"{shape[0]}x{shape[1]}, {droplets} droplets")
+        for batch_size in BATCH_SIZES:
+            heights = terrain.copy()
+            start = time.perf_counter()
+            add_hydraulic_erosion(heights, droplets=droplets, batch_size=batch_size)
+            elapsed = time.perf_counter() - start
+            print(
+                f"  batch_size={batch_size}: {droplets / elapsed:.0f} droplets/s"
+                f" ({elapsed:.2f}s)"
+            )
+        for multigrid in (False, True):
+            heights = terrain.copy()
+            start = time.perf_counter()
+            add_thermal_erosion(heights, multigrid=multigrid)
+            elapsed = time.perf_counter() - start
+            print(f"  thermal multigrid={multigrid}: {elapsed:.2f}s")
+
+    if not in_range:
+        sys.exit("Hydraulic erosion left the input height range")
+
+
+if __name__ == "__main__":
+    main()
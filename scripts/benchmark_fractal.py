@@ -0,0 +1,53 @@
+"""
+Script to report fractal noise octave throughput (Mpixel-octaves/s) to track regressions.
+"""
+
+import os
+import sys
+import time
+from functools import partial
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from terrain.generation.fractal import generate_fractal_noise
+from terrain.generation.noise import (
+    generate_fractal_perlin_noise,
+    generate_warped_noise,
+)
+
+SHAPES = [(512, 512), (2048, 2048)]
+OCTAVES = 6
+REPEATS = 3
+
+
+def throughput(func, shape, octaves):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return shape[0] * shape[1] * octaves / best / 1e6, best
+
+
+def main():
+    for shape in SHAPES:
+        perlin = partial(generate_warped_noise, shape=shape, warps=0)
+        cases = {
+            "stacked generate_fractal_perlin_noise": partial(
+                generate_fractal_perlin_noise, shape=shape, octaves=OCTAVES
+            ),
+            "generate_fractal_noise": partial(
+                generate_fractal_noise, perlin, shape, octaves=OCTAVES
+            ),
+            "generate_fractal_noise chunk_rows=64": partial(
+                generate_fractal_noise, perlin, shape, octaves=OCTAVES, chunk_rows=64
+            ),
+        }
+        print(f"{shape[0]}x{shape[1]}, {OCTAVES} octaves")
+        for name, func in cases.items():
+            rate, elapsed = throughput(func, shape, OCTAVES)
+            print(f"  {name}: {rate:.1f} Mpixel-octaves/s ({elapsed:.3f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Script to report the time of each drainage analysis stage to track regressions.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from terrain.generation.hydrology import (
+    d8_receivers,
+    flow_accumulation,
+    route_depressions,
+)
+from terrain.generation.noise import generate_fractal_perlin_noise
+
+SHAPES = [(1024, 1024), (4096, 4096)]
+
+
+def main():
+    for shape in SHAPES:
+        heights = generate_fractal_perlin_noise(shape, scale=10, octaves=8)
+        print(f"{shape[0]}x{shape[1]}")
+
+        start = time.perf_counter()
+        receivers = d8_receivers(heights)
+        print(f"  d8_receivers: {time.perf_counter() - start:.2f}s")
+
+        start = time.perf_counter()
+        receivers, filled = route_depressions(heights, receivers)
+        print(f"  route_depressions: {time.perf_counter() - start:.2f}s")
+
+        start = time.perf_counter()
+        flow_accumulation(receivers)
+        print(f"  flow_accumulation: {time.perf_counter() - start:.2f}s")
+        print(f"  lake cells: {(filled > heights).mean():.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Script to time building adaptive level of detail meshes and check their
+vertical error against the full terrain grid.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pyvista as pv
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from terrain.generation.noise import generate_fractal_perlin_noise
+from terrain.visualization.lod import build_lod_meshes
+
+SHAPES = [(512, 512), (1000, 1500), (2048, 2048)]
+
+
+def max_error(terrain, mesh):
+    """Largest height difference between the mesh and every grid sample."""
+    h, w = terrain.shape
+    flat = mesh.copy()
+    flat.points[:, 2] = 0
+    samples = pv.ImageData(dimensions=(w, h, 1)).sample(flat)
+    heights = np.asarray(samples.point_data["Data"]).reshape(h, w)
+    return np.abs(heights - terrain).max()
+
+
+def main():
+    for shape in SHAPES:
+        terrain = generate_fractal_perlin_noise(shape, scale=10, octaves=6) * 10
+        start = time.perf_counter()
+        lods = build_lod_meshes(terrain)
+        build_time = time.perf_counter() - start
+
+        grid_cells = 2 * (shape[0] - 1) * (shape[1] - 1)
+        print(f"{shape}: {len(lods)} levels in {build_time * 1000:.0f} ms")
+        for error, mesh in lods:
+            print(
+                f"  error {error:.4f}: {mesh.n_cells} triangles "
+                f"({mesh.n_cells / grid_cells:.1%} of the grid), "
+                f"measured error {max_error(terrain, mesh):.4f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Script to benchmark process pool tile evaluation against the serial noise functions.
+"""
+
+import os
+import sys
+import time
+from functools import partial
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+from terrain.generation.fractal import generate_fractal_noise
+from terrain.generation.noise import (
+    generate_fractal_perlin_noise,
+    generate_warped_noise,
+)
+from terrain.generation.parallel import parallel_generate
+
+WORKER_COUNTS = [1, 2, 4, 8, 16]
+
+
+def benchmark(name, func, shape, **kwargs):
+    start = time.perf_counter()
+    serial = func(shape=shape, **kwargs)
+    serial_time = time.perf_counter() - start
+    print(f"{name} {shape[0]}x{shape[1]}: serial {serial_time:.3f}s")
+
+    for workers in WORKER_COUNTS:
+        start = time.perf_counter()
+        result = parallel_generate(func, shape, workers=workers, **kwargs)
+        elapsed = time.perf_counter() - start
+        identical = np.array_equal(serial, result)
+        print(
+            f"  {workers:>2} workers: {elapsed:.3f}s "
+            f"speedup {serial_time / elapsed:.2f}x identical={identical}"
+        )
+
+
+def main():
+    shape = (2048, 2048)
+    benchmark("fractal perlin", generate_fractal_perlin_noise, shape, octaves=6)
+
+    warped = partial(generate_warped_noise, shape=shape, warps=1)
+    benchmark("fractal warped", generate_fractal_noise, shape, noisef=warped)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Script to time the Poisson-disk sampler and check that no two samples are
+closer than the larger of their spacings, with and without wrapping.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from terrain.generation.ecology import poisson_disk_sample
+
+MIN_DISTANCE = 2.0
+MAX_RATIO = 2.0
+SEEDS = 60
+# (shape, wrap) of the spacing checks
+CASES = [((10, 10), False), ((10, 10), True), ((64, 64), False), ((64, 64), True)]
+SHAPES = [(256, 256), (1024, 1024)]
+
+
+def min_spacing_ratio(density, samples, wrap):
+    """Smallest distance between two samples over the larger of their spacings."""
+    h, w = density.shape
+    d = density[samples[:, 1].astype(int), samples[:, 0].astype(int)]
+    radius = MIN_DISTANCE / np.sqrt(np.maximum(d, 1.0 / MAX_RATIO**2))
+    # Positions on the far edge belong to the first cell of a wrapped map
+    points = np.mod(samples, (w, h)) if wrap else samples
+    tree = cKDTree(points, boxsize=(w, h) if wrap else None)
+    pairs = tree.query_pairs(MIN_DISTANCE * MAX_RATIO, output_type="ndarray")
+    if len(pairs) == 0:
+        return np.inf
+    i, j = pairs.T
+    delta = np.abs(points[i] - points[j])
+    if wrap:
+        delta = np.minimum(delta, (w, h) - delta)
+    dist = np.hypot(delta[:, 0], delta[:, 1])
+    return (dist / np.maximum(radius[i], radius[j])).min()
+
+
+def main():
+    failed = False
+    for shape, wrap in CASES:
+        worst = np.inf
+        for seed in range(SEEDS):
+            rng = np.random.default_rng(seed)
+            # Cells alternate between the smallest and largest spacing
+            density = np.where(rng.random(shape) < 0.5, 0.5001, 1.0)
+            samples = poisson_disk_sample(
+                density, MIN_DISTANCE, MAX_RATIO, wrap=wrap, seed=seed
+            )
+            worst = min(worst, min_spacing_ratio(density, samples, wrap))
+        failed |= worst < 1.0
+        label = "wrapped" if wrap else "unwrapped"
+        print(f"{shape} {label}: closest pair at {worst:.3f} of its spacing")
+
+    for shape in SHAPES:
+        density = np.full(shape, 1.0)
+        start = time.perf_counter()
+        samples = poisson_disk_sample(density, MIN_DISTANCE)
+        elapsed = time.perf_counter() - start
+        print(f"{shape}: {len(samples)} samples in {elapsed * 1000:.0f} ms")
+
+    if failed:
+        sys.exit("Samples closer than their spacing")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Script to benchmark thread pool band evaluation against single-threaded noise generation.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from terrain.generation.noise import domain_warp, generate_perlin_noise
+from terrain.generation.parallel import threaded_noise
+
+SIZES = [512, 2048, 8192]
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main(workers=None):
+    workers = workers or os.cpu_count()
+    for size in SIZES:
+        x, y = domain_warp(shape=(size, size), scale=10)
+        try:
+            serial = timed(lambda: generate_perlin_noise(x, y))
+        except MemoryError:
+            serial = float("nan")
+        threaded = timed(lambda: threaded_noise(generate_perlin_noise, x, y, workers))
+        print(
+            f"{size}x{size}: single-threaded {serial:.3f}s, "
+            f"{workers} threads {threaded:.3f}s, speedup {serial / threaded:.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else None)
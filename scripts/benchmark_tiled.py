@@ -0,0 +1,73 @@
+"""
+Script to compare tiled hydraulic erosion with in-memory erosion on a map whose
+size is not a multiple of the tile size, checking that both erode about as much.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+from terrain.generation.erosion import add_hydraulic_erosion
+from terrain.generation.tiled import erode_tiled, generate_tiled_terrain
+
+SHAPE = (1100, 1100)
+TILE_SIZE = 512
+DROPLETS = 100000
+# Largest accepted ratio between the tiled and in-memory statistics
+MAX_RATIO = 1.5
+
+
+def describe(name, terrain, eroded, elapsed):
+    """Print and return the mean absolute change and the eroded height range."""
+    change = float(np.mean(np.abs(eroded - terrain)))
+    low, high = float(eroded.min()), float(eroded.max())
+    print(
+        f"{name}: mean abs change {change:.4f}, heights [{low:.3f}, {high:.3f}]"
+        f" ({elapsed:.2f}s)"
+    )
+    return change, low, high
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "terrain.npy")
+        out_path = os.path.join(tmp, "eroded.npy")
+        terrain = np.array(
+            generate_tiled_terrain(path, SHAPE, TILE_SIZE, scale=4, octaves=6)
+        )
+
+        start = time.perf_counter()
+        memory = add_hydraulic_erosion(terrain.copy(), droplets=DROPLETS)
+        memory_stats = describe(
+            "in memory", terrain, memory, time.perf_counter() - start
+        )
+
+        start = time.perf_counter()
+        tiled = erode_tiled(
+            path,
+            out_path,
+            erosion=add_hydraulic_erosion,
+            tile_size=TILE_SIZE,
+            passes=1,
+            droplets=DROPLETS,
+        )
+        tiled_stats = describe(
+            f"tiled {TILE_SIZE}", terrain, np.array(tiled), time.perf_counter() - start
+        )
+        del tiled
+
+    ratio = tiled_stats[0] / memory_stats[0]
+    print(f"tiled / in-memory mean abs change: {ratio:.2f}")
+    if not 1 / MAX_RATIO <= ratio <= MAX_RATIO:
+        sys.exit("Tiled erosion differs from in-memory erosion")
+    if tiled_stats[1] < terrain.min() or tiled_stats[2] > terrain.max():
+        sys.exit("Tiled erosion left the input height range")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Script to time building and rendering instanced tree meshes.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pyvista as pv
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from terrain.generation.noise import generate_fractal_perlin_noise
+from terrain.visualization.pyvista_vis import add_tree_mesh, build_tree_mesh
+
+# Uniform densities giving roughly 10k and 100k trees on the terrain below
+DENSITIES = [0.06, 0.6]
+SHAPE = (1024, 1024)
+
+
+def main():
+    terrain = generate_fractal_perlin_noise(SHAPE, scale=10, octaves=4) * 10
+    for value in DENSITIES:
+        density = np.full(SHAPE, value)
+
+        start = time.perf_counter()
+        trees = build_tree_mesh(terrain, density)
+        build_time = time.perf_counter() - start
+
+        plotter = pv.Plotter(off_screen=True)
+        start = time.perf_counter()
+        add_tree_mesh(plotter, trees)
+        plotter.render()
+        render_time = time.perf_counter() - start
+        plotter.close()
+
+        # Every tree is a cone of resolution 8 with 9 points
+        n_trees = trees.n_points // 9
+        print(
+            f"{n_trees} trees: build {build_time * 1000:.0f} ms, "
+            f"first render {render_time * 1000:.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Vectorized ecology layer: biome classes and tree density from a heightmap.
+"""
+
+import numpy as np
+from scipy import ndimage
+
+# Biome classes stored in the biome map
+GRASSLAND = 0
+WETLAND = 1
+FOREST = 2
+ALPINE = 3
+CLIFF = 4
+BIOMES = ("grassland", "wetland", "forest", "alpine", "cliff")
+
+
+def terrain_slope(terrain, spacing=1.0, gradient=None):
+    """
+    Slope of a heightmap as rendered, i.e. rise over run between samples.
+
+    Args:
+        terrain (np.ndarray): 2D heightmap.
+        spacing (float): Distance between samples.
+        gradient (tuple): Optional (d/dx, d/dy) of the heightmap per grid cell,
+                          e.g. analytic noise derivatives scaled like the
+                          heights, used instead of np.gradient.
+    Returns:
+        np.ndarray: Gradient magnitude per cell, 1 for a 45 degree slope.
+    """
+    if gradient is not None:
+        gx, gy = gradient
+        return np.hypot(gx, gy) / spacing
+    gy, gx = np.gradient(terrain.astype(np.float32), spacing)
+    return np.hypot(gx, gy)
+
+
+def moisture_proxy(height, radius=0.05):
+    """
+    Estimate moisture from how low a cell lies compared to its surroundings,
+    as water collects in lowlands and valleys.
+
+    Args:
+        height (np.ndarray): 2D heightmap normalized to [0, 1].
+        radius (float): Smoothing radius as a fraction of the larger side.
+    Returns:
+        np.ndarray: Moisture in [0, 1].
+    """
+    sigma = max(1.0, radius * max(height.shape))
+    lowland = ndimage.gaussian_filter(1.0 - height, sigma)
+    # Cells below their neighbourhood are valleys, above it ridges
+    valley = ndimage.gaussian_filter(height, sigma) - height
+    moisture = lowland + 4.0 * valley
+    moisture -= moisture.min()
+    peak = moisture.max()
+    if peak > 0:
+        moisture /= peak
+    return moisture
+
+
+def compute_ecology(
+    terrain,
+    forest_band=(0.2, 0.6),
+    alpine_height=0.6,
+    wetland_moisture=0.8,
+    max_slope=2.0,
+    noise_amount=0.3,
+    smoothing=2.0,
+    seed=0,
+    spacing=1.0,
+    gradient=None,
+):
+    """
+    Compute tree density and biome classes of a heightmap of any shape.
+
+    Trees grow best in the middle of the forest height band, thin out on
+    steep slopes and dry ground, and sparsely grow elsewhere.
+
+    Args:
+        terrain (np.ndarray): 2D heightmap.
+        forest_band (tuple): (low, high) normalized heights of the forest band.
+        alpine_height (float): Normalized height above which cells are alpine.
+        wetland_moisture (float): Moisture above which lowland cells are wetland.
+        max_slope (float): Rise over run at which no trees grow and cells
+                           become cliffs.
+        noise_amount (float): Amplitude of the uniform noise roughening the
+                              forest edges.
+        smoothing (float): Standard deviation in cells of the final blur.
+        seed (int): Seed of the edge noise.
+        spacing (float): Distance between samples, for the slope.
+        gradient (tuple): Optional (d/dx, d/dy) per grid cell, see terrain_slope.
+    Returns:
+        tuple: (density, biomes) with density in [0, 1] as float32 and biomes
+               as uint8 indices into BIOMES.
+    """
+    span = np.ptp(terrain) or 1.0
+    height = ((terrain - np.min(terrain)) / span).astype(np.float32)
+    slope = terrain_slope(terrain, spacing, gradient)
+    moisture = moisture_proxy(height)
+
+    # Density peaks in the middle of the forest band
+    low, high = forest_band
+    center, half = (low + high) / 2, (high - low) / 2
+    in_band = (height > low) & (height < high)
+    density = np.where(in_band, 1.0 - np.abs(height - center) / (1.2 * half), 0.1)
+    density *= 0.7 + 0.6 * moisture
+    density *= np.clip(1.0 - (slope / max_slope) ** 2, 0.0, 1.0)
+
+    rng = np.random.default_rng(seed)
+    density += rng.random(terrain.shape, dtype=np.float32) * noise_amount
+    np.clip(density, 0.0, 1.0, out=density)
+    density = ndimage.gaussian_filter(density.astype(np.float32), smoothing)
+
+    biomes = np.full(terrain.shape, GRASSLAND, dtype=np.uint8)
+    biomes[(height <= low) & (moisture > wetland_moisture)] = WETLAND
+    biomes[in_band] = FOREST
+    biomes[height > alpine_height] = ALPINE
+    biomes[slope > max_slope] = CLIFF
+    return density, biomes
+
+
+def poisson_disk_sample(
+    density,
+    min_distance=2.0,
+    max_ratio=2.0,
+    attempts=5,
+    wrap=False,
+    seed=0,
+):
+    """
+    Place blue noise samples over a density map with varying spacing.
+
+    Samples are kept apart by min_distance / sqrt(density), so their number
+    per area follows the density, and cells below 1 / max_ratio**2 are
+    thinned at random instead of spacing their samples further. A background
+    grid with cells small enough to hold one sample each makes every
+    neighbour check a fixed window lookup. The grid cells are processed in
+    phases of cells further apart than the largest spacing, so all cells of a
+    phase draw and test their candidates at once.
+
+    Args:
+        density (np.ndarray): 2D density in [0, 1] per unit cell.
+        min_distance (float): Spacing of the samples where density is 1.
+        max_ratio (float): Largest spacing as a multiple of min_distance.
+        attempts (int): Candidates drawn per grid cell before giving up.
+        wrap (bool): Measure distances across opposite edges, so the samples
+                     of a periodic density map tile seamlessly.
+        seed (int): Seed of the candidates.
+    Returns:
+        np.ndarray: (n, 2) sample positions (x, y) in density cell units.
+    """
+    h, w = density.shape
+    rng = np.random.default_rng(seed)
+    density = density.astype(np.float32)
+    min_density = 1.0 / max_ratio**2
+    max_distance = min_distance / np.sqrt(max(density.min(), min_density))
+
+    # Cells of at most min_distance / sqrt(2) hold at most one sample. The
+    # window must reach max_distance in cells of the actual, smaller size,
+    # and cells of one phase are a window apart. Wrapped grids are a multiple
+    # of the phase step so the phases stay apart across the edges too, which
+    # shrinks the cells and may widen the window again.
+    if wrap and min(h, w) <= 2 * max_distance:
+        raise ValueError("Wrapped maps must span twice the largest spacing.")
+    cell = min_distance / np.sqrt(2)
+    min_h, min_w = int(np.ceil(h / cell)), int(np.ceil(w / cell))
+    gh, gw, reach = min_h, min_w, 0
+    while True:
+        step = reach + 1
+        if wrap:
+            gh, gw = -(-min_h // step) * step, -(-min_w // step) * step
+        needed = int(np.ceil(max_distance / min(h / gh, w / gw)))
+        if needed <= reach:
+            break
+        reach = needed
+    cell_h, cell_w = h / gh, w / gw
+
+    # Samples per grid cell, padded by the window so lookups need no bounds
+    # checks. Wrapped grids also store every sample near an edge shifted
+    # into the padding on the opposite side.
+    ph, pw = gh + 2 * reach, gw + 2 * reach
+    sample_x = np.full(ph * pw, np.nan, dtype=np.float32)
+    sample_y = np.full(ph * pw, np.nan, dtype=np.float32)
+    sample_r = np.zeros(ph * pw, dtype=np.float32)
+    open_cell = np.ones(gh * gw, dtype=bool)
+
+    # Only the window cells that can be closer than max_distance
+    window = np.arange(-reach, reach + 1)
+    offset_y, offset_x = np.meshgrid(window, window, indexing="ij")
+    gap_y = np.maximum(np.abs(offset_y) - 1, 0) * cell_h
+    gap_x = np.maximum(np.abs(offset_x) - 1, 0) * cell_w
+    near = np.hypot(gap_y, gap_x) < max_distance
+    offsets = (offset_y * pw + offset_x)[near]
+
+    cells_y, cells_x = np.divmod(np.arange(gh * gw), gw)
+    phase = (cells_y % step) * step + cells_x % step
+    order = np.argsort(phase, kind="stable")
+    phases = np.split(order, np.cumsum(np.bincount(phase, minlength=step**2))[:-1])
+    shifts = [(0, 0)]
+    if wrap:
+        shifts = [(sy, sx) for sy in (-1, 0, 1) for sx in (-1, 0, 1)]
+
+    for _ in range(attempts):
+        for phase_cells in phases:
+            cells = phase_cells[open_cell[phase_cells]]
+            if len(cells) == 0:
+                continue
+            cy, cx = cells_y[cells], cells_x[cells]
+            x = ((cx + rng.random(len(cells), dtype=np.float32)) * cell_w).astype(
+                np.float32
+            )
+            y = ((cy + rng.random(len(cells), dtype=np.float32)) * cell_h).astype(
+                np.float32
+            )
+            d = density[
+                np.minimum(y.astype(int), h - 1), np.minimum(x.astype(int), w - 1)
+            ]
+            radius = min_distance / np.sqrt(np.maximum(d, min_density))
+
+            # Empty neighbours have NaN positions, which never conflict
+            neighbour = ((cy + reach) * pw + cx + reach)[:, None] + offsets
+            dx = sample_x[neighbour] - x[:, None]
+            dy = sample_y[neighbour] - y[:, None]
+            limit = np.maximum(radius[:, None], sample_r[neighbour])
+            conflict = dx * dx + dy * dy < limit * limit
+            accepted = ~conflict.any(axis=1) & (d > 0)
+
+            # Cells without density where the candidate landed stay empty
+            open_cell[cells[d <= 0]] = False
+            new = accepted.nonzero()[0]
+            open_cell[cells[new]] = False
+            for sy, sx in shifts:
+                ty, tx = cy[new] + reach + sy * gh, cx[new] + reach + sx * gw
+                inside = (ty >= 0) & (ty < ph) & (tx >= 0) & (tx < pw)
+                target = ty[inside] * pw + tx[inside]
+                sample_x[target] = x[new][inside] + sx * w
+                sample_y[target] = y[new][inside] + sy * h
+                sample_r[target] = radius[new][inside]
+
+    grid_x = sample_x.reshape(ph, pw)[reach : reach + gh, reach : reach + gw]
+    grid_y = sample_y.reshape(ph, pw)[reach : reach + gh, reach : reach + gw]
+    filled = ~np.isnan(grid_x)
+    x, y = grid_x[filled], grid_y[filled]
+
+    # Thin out the samples where the density is below the largest spacing
+    d = density[np.minimum(y.astype(int), h - 1), np.minimum(x.astype(int), w - 1)]
+    keep = rng.random(len(x)) < d / min_density
+    return np.column_stack([x[keep], y[keep]])
@@ -1,23 +1,35 @@
 import numpy as np
 
+from .fractal import upsample_grid
+
+# Neighbour offsets (dy, dx) of the 8-neighbour stencil and their distances
+NEIGHBOURS = [(dy, dx) for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dy or dx]
+NEIGHBOUR_DISTANCES = [np.hypot(dy, dx) for dy, dx in NEIGHBOURS]
+
 
 def add_erosion(
     noise,
     erosion_factor=0.8,
+    gradient=None,
 ):
-    scale = 10
+    """
+    Erode a heightmap by subtracting its accumulated squared slope.
+
+    Args:
+        noise (np.ndarray): 2D heightmap, modified in place.
+        erosion_factor (float): Strength of the erosion.
+        gradient (tuple): Optional (d/dx, d/dy) of the heightmap per grid cell,
+                          e.g. the analytic derivatives returned by
+                          generate_fractal_perlin_noise(derivatives=True). It then
+                          drives every octave instead of differentiating the
+                          heightmap with np.gradient each time.
+    Returns:
+        np.ndarray: The eroded heightmap.
+    """
     octaves = 4
     persistence = 0.5
-    offset = (0.0, 0.0)
-    zoom = 1.0
     noise_min = np.min(noise)
 
-    w, h = noise.shape
-    # Initialize coordinates
-    lin_x = np.linspace(0, scale / zoom, w, endpoint=False) + offset[0]
-    lin_y = np.linspace(0, scale / zoom, h, endpoint=False) + offset[1]
-    x, y = np.meshgrid(lin_x, lin_y)
-
     amplitude = 1.0
     max_amplitude = 0.0
 
@@ -26,7 +38,10 @@ def add_erosion(
     )
 
     for _ in range(octaves):
-        gx, gy = np.gradient(noise)
+        if gradient is None:
+            gx, gy = np.gradient(noise)
+        else:
+            gx, gy = gradient
         dx += gx
         dy += gy
 
@@ -41,3 +56,340 @@ def add_erosion(
     noise += noise_min - np.min(noise)
 
     return noise
+
+
+def _bilinear(heights, ix, iy, fx, fy):
+    """
+    Sample the heightmap and its gradient at the given cells and offsets.
+    Returns the corner flat indices with the height and (d/dx, d/dy).
+    """
+    w = heights.shape[1]
+    flat = heights.ravel()
+    i00 = iy * w + ix
+    i10, i01 = i00 + 1, i00 + w
+    i11 = i01 + 1
+    h00, h10, h01, h11 = flat[i00], flat[i10], flat[i01], flat[i11]
+
+    gx = (h10 - h00) * (1 - fy) + (h11 - h01) * fy
+    gy = (h01 - h00) * (1 - fx) + (h11 - h10) * fx
+    height = (
+        h00 + fx * (h10 - h00) + fy * (h01 - h00) + fx * fy * (h00 - h10 - h01 + h11)
+    )
+    return (i00, i10, i01, i11), height, gx, gy
+
+
+def _scatter(heights, corners, ix, iy, fx, fy, amount, total):
+    """
+    Add amount to the heightmap, split bilinearly over the four corners of
+    the cells (ix, iy).
+
+    Every droplet limits its own change by the height difference it sees, but
+    droplets of a batch meeting at the same cells add up. The combined change
+    of a cell in one step is therefore clamped to the range of its 8
+    neighbours, so no cell is dug below or piled above its surroundings. The
+    change actually applied is returned per droplet to keep its sediment
+    balanced. total is a zeroed flat buffer of the map size, left zeroed.
+    """
+    h, w = heights.shape
+    flat = heights.ravel()
+    wx0, wy0 = amount * (1 - fx), 1 - fy
+    wx1 = amount * fx
+    weights = np.concatenate([wx0 * wy0, wx1 * wy0, wx0 * fy, wx1 * fy])
+    cells = np.concatenate(corners)
+    np.add.at(total, cells, weights)
+    change = total[cells]
+    total[cells] = 0
+
+    # The 3x3 neighbourhoods of the four corners lie in the 4x4 block around
+    # them, clamped to the map
+    steps = np.arange(-1, 3)[:, None]
+    rows = np.clip(iy + steps, 0, h - 1) * w
+    cols = np.clip(ix + steps, 0, w - 1)
+    block = flat[rows[:, None] + cols[None]]
+    lowest, highest = block[:-2], block[:-2]
+    for k in (1, 2):
+        lowest = np.minimum(lowest, block[k : k + 2])
+        highest = np.maximum(highest, block[k : k + 2])
+    low_y, high_y = lowest, highest
+    lowest, highest = low_y[:, :-2], high_y[:, :-2]
+    for k in (1, 2):
+        lowest = np.minimum(lowest, low_y[:, k : k + 2])
+        highest = np.maximum(highest, high_y[:, k : k + 2])
+    # Corners in the order of _bilinear: (0, 0), (0, 1), (1, 0), (1, 1)
+    lowest, highest = lowest.reshape(-1), highest.reshape(-1)
+
+    # Cells shared by several droplets get the same clamped height each time
+    before = flat[cells]
+    after = np.clip(before + change, lowest, highest)
+    flat[cells] = after
+
+    factor = np.divide(
+        after - before, change, out=np.ones_like(change), where=change != 0
+    )
+    return (weights * factor).reshape(4, -1).sum(axis=0)
+
+
+def add_hydraulic_erosion(
+    noise,
+    droplets=100000,
+    batch_size=8192,
+    max_steps=64,
+    inertia=0.05,
+    capacity=4.0,
+    min_capacity=0.01,
+    erode_rate=0.3,
+    deposit_rate=0.3,
+    evaporation=0.02,
+    gravity=4.0,
+    seed=0,
+    should_stop=None,
+    flow=None,
+    flow_weight=4.0,
+):
+    """
+    Erode a heightmap by simulating water droplets carrying sediment downhill.
+
+    Droplets are simulated in batches, advancing every live droplet of a batch
+    one step per iteration. Heights and gradients are sampled bilinearly, and
+    eroded or deposited sediment is scattered over the four surrounding cells.
+    Droplets stop when they leave the map, evaporate or reach max_steps, and a
+    batch ends as soon as all of its droplets have stopped.
+
+    Args:
+        noise (np.ndarray): 2D heightmap, modified in place.
+        droplets (int): Total number of droplets to simulate.
+        batch_size (int): Droplets advanced together in one vectorized step.
+        max_steps (int): Maximum lifetime of a droplet in steps.
+        inertia (float): How much a droplet keeps its direction, in [0, 1].
+        capacity (float): Sediment capacity per unit of slope, speed and water.
+        min_capacity (float): Capacity on flat ground, relative to the height range.
+        erode_rate (float): Fraction of the free capacity eroded per step.
+        deposit_rate (float): Fraction of the excess sediment deposited per step.
+        evaporation (float): Fraction of the water evaporating per step.
+        gravity (float): Acceleration of droplets going downhill.
+        seed (int): Seed of the droplet spawn positions.
+        should_stop (callable): Optional, checked between batches; the simulation
+                                stops early once it returns True.
+        flow (np.ndarray): Optional accumulated drainage area per cell, e.g. from
+                           hydrology.analyze_drainage. The capacity of a droplet
+                           then grows with the log of the area draining through
+                           its cell, so channels deepen along the drainage.
+        flow_weight (float): Extra capacity at the main outlet of the flow,
+                             relative to the capacity on ridges.
+    Returns:
+        np.ndarray: The eroded heightmap.
+    """
+    h, w = noise.shape
+    if h < 2 or w < 2:
+        raise ValueError("heightmap must have at least 2 rows and 2 columns")
+    rng = np.random.default_rng(seed)
+    heights = noise if noise.dtype == np.float32 else noise.astype(np.float32)
+    min_capacity *= float(np.ptp(heights))
+
+    # Per cell sum of the changes of one step, see _scatter
+    total = np.zeros(h * w, dtype=np.float32)
+
+    discharge = None
+    if flow is not None:
+        # From 1 on ridges to 1 + flow_weight at the main outlet
+        discharge = np.log(np.maximum(np.ravel(flow), 1.0)).astype(np.float32)
+        discharge = 1 + flow_weight * discharge / max(float(discharge.max()), 1.0)
+
+    for start in range(0, droplets, batch_size):
+        if should_stop is not None and should_stop():
+            break
+
+        n = min(batch_size, droplets - start)
+        pos_x = rng.uniform(0, w - 1, n).astype(np.float32)
+        pos_y = rng.uniform(0, h - 1, n).astype(np.float32)
+        dir_x = np.zeros(n, dtype=np.float32)
+        dir_y = np.zeros(n, dtype=np.float32)
+        speed = np.ones(n, dtype=np.float32)
+        water = np.ones(n, dtype=np.float32)
+        sediment = np.zeros(n, dtype=np.float32)
+
+        for _ in range(max_steps):
+            fx, fy = pos_x % 1, pos_y % 1
+            ix, iy = pos_x.astype(np.intp), pos_y.astype(np.intp)
+            corners, height, gx, gy = _bilinear(heights, ix, iy, fx, fy)
+
+            # Blend the previous direction with the downhill direction
+            dir_x = dir_x * inertia - gx * (1 - inertia)
+            dir_y = dir_y * inertia - gy * (1 - inertia)
+            length = np.sqrt(dir_x * dir_x + dir_y * dir_y)
+            moving = length > 0
+            length[~moving] = 1
+            dir_x /= length
+            dir_y /= length
+            pos_x = pos_x + dir_x
+            pos_y = pos_y + dir_y
+
+            # Droplets leaving the map or standing still carry nothing further
+            inside = (
+                moving & (pos_x >= 0) & (pos_x < w - 1) & (pos_y >= 0) & (pos_y < h - 1)
+            )
+            new_x = np.where(inside, pos_x, 0)
+            new_y = np.where(inside, pos_y, 0)
+            _, new_height, _, _ = _bilinear(
+                heights,
+                new_x.astype(np.intp),
+                new_y.astype(np.intp),
+                new_x % 1,
+                new_y % 1,
+            )
+            delta = np.where(inside, new_height - height, 0)
+
+            # Deposit when going uphill or carrying more than the capacity,
+            # otherwise erode up to the height difference
+            cap = np.maximum(-delta * speed * water * capacity, min_capacity)
+            if discharge is not None:
+                cap *= discharge[corners[0]]
+            depositing = (delta > 0) | (sediment > cap)
+            deposit = np.where(
+                delta > 0,
+                np.minimum(delta, sediment),
+                (sediment - cap) * deposit_rate,
+            )
+            erode = np.minimum((cap - sediment) * erode_rate, -delta)
+            change = np.where(depositing, deposit, -erode)
+            change[~inside] = 0
+            sediment -= _scatter(heights, corners, ix, iy, fx, fy, change, total)
+
+            speed = np.sqrt(np.maximum(speed * speed - delta * gravity, 0))
+            water *= 1 - evaporation
+
+            # Keep only the droplets still flowing
+            alive = np.flatnonzero(inside)
+            if alive.size == 0:
+                break
+            if alive.size < len(inside):
+                pos_x, pos_y = pos_x[alive], pos_y[alive]
+                dir_x, dir_y = dir_x[alive], dir_y[alive]
+                speed, water, sediment = speed[alive], water[alive], sediment[alive]
+
+    if heights is not noise:
+        noise[...] = heights
+    return noise
+
+
+def _talus_excess(center, padded, offset, drop, out):
+    """
+    Height above the talus slope of every cell over its neighbour at offset,
+    clamped at zero. Padded holds the heights with a one cell border.
+    """
+    h, w = center.shape
+    dy, dx = offset
+    np.subtract(center, padded[1 + dy : h + 1 + dy, 1 + dx : w + 1 + dx], out=out)
+    out -= drop
+    np.maximum(out, 0, out=out)
+    return out
+
+
+def _thermal_sweeps(heights, talus, rate, tolerance, max_iterations):
+    """
+    Relax a heightmap in place until the most material moved out of any cell
+    in one sweep drops below tolerance. Returns the number of sweeps.
+    """
+    h, w = heights.shape
+    # Padding with +inf keeps material from flowing off the map
+    src = np.full((h + 2, w + 2), np.inf, dtype=np.float32)
+    dst = np.full((h + 2, w + 2), np.inf, dtype=np.float32)
+    src[1:-1, 1:-1] = heights
+
+    excess = np.empty((h, w), dtype=np.float32)
+    total = np.empty((h, w), dtype=np.float32)
+    largest = np.empty((h, w), dtype=np.float32)
+    share = np.empty((h, w), dtype=np.float32)
+    drops = [talus * dist for dist in NEIGHBOUR_DISTANCES]
+
+    sweeps = 0
+    while sweeps < max_iterations:
+        center = src[1:-1, 1:-1]
+        total.fill(0)
+        largest.fill(0)
+        for offset, drop in zip(NEIGHBOURS, drops):
+            _talus_excess(center, src, offset, drop, excess)
+            total += excess
+            np.maximum(largest, excess, out=largest)
+
+        sweeps += 1
+        largest *= rate
+        if largest.max() < tolerance:
+            break
+
+        # Move rate * the largest excess out of every cell, split over the
+        # neighbours below the talus slope in proportion to their excess
+        share.fill(0)
+        np.divide(largest, total, out=share, where=total > 0)
+        dst[1:-1, 1:-1] = center
+        for (dy, dx), drop in zip(NEIGHBOURS, drops):
+            _talus_excess(center, src, (dy, dx), drop, excess)
+            excess *= share
+            dst[1:-1, 1:-1] -= excess
+            dst[1 + dy : h + 1 + dy, 1 + dx : w + 1 + dx] += excess
+        src, dst = dst, src
+
+    heights[...] = src[1:-1, 1:-1]
+    return sweeps
+
+
+def add_thermal_erosion(
+    noise,
+    talus=16.0,
+    rate=0.5,
+    tolerance=1e-4,
+    max_iterations=500,
+    multigrid=True,
+    min_size=64,
+    extent=None,
+):
+    """
+    Erode a heightmap by letting material slide down slopes steeper than the
+    talus slope until it settles.
+
+    Every sweep applies an 8-neighbour stencil to the whole map, reading one
+    buffer and writing the other. The sweeps stop once the most material moved
+    out of any cell falls below tolerance. With multigrid, every other sample
+    of the map is eroded first, recursively down to min_size, and the coarse
+    change is upsampled as the starting point, so large maps need far fewer
+    full resolution sweeps.
+
+    Args:
+        noise (np.ndarray): 2D heightmap, modified in place.
+        talus (float): Steepest stable slope, as the height difference across
+                       the width of the map so it does not depend on resolution.
+        rate (float): Fraction of the excess height moved per sweep, at most 0.5.
+        tolerance (float): Stop once no cell moves more material than this.
+        max_iterations (int): Maximum number of sweeps per resolution.
+        multigrid (bool): Converge at coarser resolutions first.
+        min_size (int): Smallest side length of the coarsest resolution.
+        extent (float): Width in cells the talus slope is measured across,
+                        defaults to the larger side of the heightmap. Set it
+                        to the full map width when eroding a tile of a map.
+    Returns:
+        np.ndarray: The eroded heightmap.
+    """
+    h, w = noise.shape
+    heights = noise.astype(np.float32)
+    extent = max(h, w) if extent is None else extent
+
+    if multigrid and min(h, w) >= 2 * min_size:
+        coarse = heights[::2, ::2]
+        eroded = add_thermal_erosion(
+            coarse.copy(),
+            talus,
+            rate,
+            tolerance,
+            max_iterations,
+            multigrid,
+            min_size,
+            extent / 2,
+        )
+        # Thermal erosion only moves material, so keep the total unchanged
+        change = upsample_grid(eroded - coarse, (h, w), stride=2)
+        change -= change.mean()
+        heights += change
+
+    _thermal_sweeps(heights, talus / extent, rate, tolerance, max_iterations)
+    noise[...] = heights
+    return noise
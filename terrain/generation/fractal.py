@@ -5,6 +5,45 @@ Fractal Perlin noise terrain generation implementation.
 import numpy as np
 
 
+def octave_parameters(
+    scale=10,
+    offset=(0.0, 0.0),
+    zoom=1.0,
+    octaves=4,
+    persistence=0.5,
+    lacunarity=2.0,
+):
+    """
+    Compute the per-octave sampling parameters of a fractal sum.
+
+    Args:
+        scale (float): Base scale (frequency) of the first octave.
+        offset (tuple): (x, y) offset of the first octave.
+        zoom (float): Zoom factor; >1 zooms in, <1 zooms out.
+        octaves (int): Number of noise layers to sum.
+        persistence (float): Amplitude multiplier for each octave.
+        lacunarity (float): Frequency multiplier for each octave.
+    Returns:
+        tuple: Lists (scales, offsets, amplitudes) with one entry per octave and
+               the sum of all amplitudes used to normalize the result.
+    """
+    scales, offsets, amplitudes = [], [], []
+    amplitude = 1.0
+    frequency = 1.0
+    max_amplitude = 0.0
+
+    for _ in range(octaves):
+        # Offset is scaled by frequency to allow zooming/panning
+        offsets.append((offset[0] * frequency, offset[1] * frequency))
+        scales.append((scale * frequency) / zoom)
+        amplitudes.append(amplitude)
+
+        max_amplitude += amplitude
+        amplitude *= persistence
+        frequency *= lacunarity
+    return scales, offsets, amplitudes, max_amplitude
+
+
 def generate_fractal_noise(
     noisef,
     shape=(100, 100),
@@ -14,6 +53,10 @@ def generate_fractal_noise(
     octaves=4,
     persistence=0.5,
     lacunarity=2.0,
+    window=None,
+    chunk_rows=None,
+    keep_layers=False,
+    derivatives=False,
 ):
     """
     Generate a 2D fractal (FBM) Perlin noise array by summing multiple octaves.
@@ -25,26 +68,147 @@ def generate_fractal_noise(
         lacunarity (float): Frequency multiplier for each octave.
         offset (tuple): (x, y) offset to shift the sampled region (applied to all octaves, scaled by frequency).
         zoom (float): Zoom factor; >1 zooms in, <1 zooms out.
+        window (tuple): Optional ((row_start, row_stop), (col_start, col_stop))
+                        region of the grid to generate. It is forwarded to noisef,
+                        which must then accept a window keyword.
+        chunk_rows (int): Evaluate all octaves over bands of this many rows at a
+                          time so the scratch buffers stay small. Requires noisef
+                          to accept a window keyword.
+        keep_layers (bool): Also return the unweighted noise of every octave.
+        derivatives (bool): noisef returns (noise, d/dx, d/dy) with the
+                            derivatives per grid cell, which are summed too.
     Returns:
         np.ndarray: 2D array of fractal Perlin noise values in range [-1, 1].
+                    With keep_layers, a tuple (noise, layers) where layers has
+                    shape (octaves, height, width). With derivatives, the
+                    summed d/dx and d/dy follow the noise in the tuple.
     """
-    w, h = shape
-    noise = np.zeros(shape, dtype=np.float32)
-    amplitude = 1.0
-    frequency = 1.0
-    max_amplitude = 0.0
+    scales, offsets, amplitudes, max_amplitude = octave_parameters(
+        scale, offset, zoom, octaves, persistence, lacunarity
+    )
+    (r0, r1), cols = window if window is not None else ((0, shape[0]), (0, shape[1]))
+    h, w = r1 - r0, cols[1] - cols[0]
+    noise = np.zeros((h, w), dtype=np.float32)
+    layers = np.empty((octaves, h, w), dtype=np.float32) if keep_layers else None
+    gradient = np.zeros((2, h, w), dtype=np.float32) if derivatives else None
 
-    for _ in range(octaves):
-        # Offset is scaled by frequency to allow zooming/panning
-        octave_offset = (offset[0] * frequency, offset[1] * frequency)
-        octave_scale = (scale * frequency) / zoom
+    if chunk_rows is None:
+        bands = [(r0, r1)]
+    else:
+        bands = [(r, min(r + chunk_rows, r1)) for r in range(r0, r1, chunk_rows)]
+    scratch = np.empty((min(h, bands[0][1] - bands[0][0]), w), dtype=np.float32)
 
-        cur_noise = noisef(scale=octave_scale, offset=octave_offset)
+    for b0, b1 in bands:
+        acc = noise[b0 - r0 : b1 - r0]
+        tmp = scratch[: b1 - b0]
+        window_kwargs = {}
+        if window is not None or chunk_rows is not None:
+            window_kwargs = dict(window=((b0, b1), cols))
 
-        noise += amplitude * cur_noise
+        for k in range(octaves):
+            cur_noise = noisef(scale=scales[k], offset=offsets[k], **window_kwargs)
+            if gradient is not None:
+                cur_noise, dx, dy = cur_noise
+                gradient[0, b0 - r0 : b1 - r0] += amplitudes[k] * dx
+                gradient[1, b0 - r0 : b1 - r0] += amplitudes[k] * dy
+            if layers is not None:
+                layers[k, b0 - r0 : b1 - r0] = cur_noise
+
+            np.multiply(cur_noise, amplitudes[k], out=tmp)
+            np.add(acc, tmp, out=acc)
 
-        max_amplitude += amplitude
-        amplitude *= persistence
-        frequency *= lacunarity
     noise /= max_amplitude
-    return noise
+    result = (noise,)
+    if derivatives:
+        gradient /= max_amplitude
+        result += (gradient[0], gradient[1])
+    if keep_layers:
+        result += (layers,)
+    return result if len(result) > 1 else noise
+
+
+def upsample_grid(coarse, shape, stride=None):
+    """
+    Bilinearly resample a grid onto a finer grid covering the same extent.
+    Sample i of an axis with n samples lies at i / n of the extent, like the
+    grids sampled by the noise functions. With stride, coarse sample j lies on
+    fine sample j * stride instead, as for a grid taken with [::stride], and
+    fine samples past the last coarse one repeat its value.
+    """
+    out = coarse
+    for axis, n in enumerate(shape):
+        m = out.shape[axis]
+        pos = np.arange(n) * (m / n) if stride is None else np.arange(n) / stride
+        i0 = np.minimum(pos.astype(np.intp), m - 1)
+        i1 = np.minimum(i0 + 1, m - 1)
+        t = (pos - i0).astype(np.float32)
+        if axis == 0:
+            t = t[:, None]
+        lo, hi = np.take(out, i0, axis=axis), np.take(out, i1, axis=axis)
+        hi -= lo
+        hi *= t
+        hi += lo
+        out = hi
+    return out
+
+
+def generate_progressive_fractal_noise(
+    noisef,
+    shape=(100, 100),
+    scale=10,
+    offset=(0.0, 0.0),
+    zoom=1.0,
+    octaves=4,
+    persistence=0.5,
+    lacunarity=2.0,
+    levels=(8, 4, 2, 1),
+    min_samples=8,
+):
+    """
+    Generate fractal noise coarse to fine, yielding a refinement per level.
+
+    Every octave is evaluated once, at the coarsest level with at least
+    min_samples samples per noise period along both axes. Each level upsamples
+    the accumulation of the coarser level and adds only the octaves it resolves,
+    so the low frequency octaves are not recomputed at higher resolutions.
+    Octaves too fine for every level are evaluated at the last one.
+
+    Args:
+        noisef (callable): Noise function called as noisef(shape=, scale=, offset=).
+        shape (tuple): Output shape (height, width) of the finest level.
+        scale, offset, zoom, octaves, persistence, lacunarity: As in
+            generate_fractal_noise.
+        levels (tuple): Downsampling factors of the levels, coarse to fine.
+        min_samples (float): Samples per noise period needed to evaluate an
+                             octave at a level instead of a finer one.
+    Yields:
+        np.ndarray: Normalized fractal noise of shape ceil(shape / level) for
+                    each level, the last one being the finest.
+    """
+    scales, offsets, amplitudes, max_amplitude = octave_parameters(
+        scale, offset, zoom, octaves, persistence, lacunarity
+    )
+    level_shapes = [tuple(-(-n // level) for n in shape) for level in levels]
+
+    # Coarsest level resolving each octave, octaves are ordered by frequency
+    octave_levels = []
+    for k in range(octaves):
+        resolved = [
+            i for i, s in enumerate(level_shapes) if min(s) >= min_samples * scales[k]
+        ]
+        octave_levels.append(resolved[0] if resolved else len(levels) - 1)
+
+    acc = None
+    for i, level_shape in enumerate(level_shapes):
+        if acc is None:
+            acc = np.zeros(level_shape, dtype=np.float32)
+        elif acc.shape != level_shape:
+            acc = upsample_grid(acc, level_shape)
+
+        for k in range(octaves):
+            if octave_levels[k] != i:
+                continue
+            cur_noise = noisef(shape=level_shape, scale=scales[k], offset=offsets[k])
+            acc += np.multiply(cur_noise, amplitudes[k], dtype=np.float32)
+
+        yield acc / max_amplitude
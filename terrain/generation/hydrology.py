@@ -0,0 +1,307 @@
+"""
+Drainage analysis of heightmaps: depression filling, D8 flow and rivers.
+
+Cells are addressed by their flat (row-major) index and flow is described by a
+receivers array, where receivers[i] is the cell that cell i drains into and
+outlets drain into themselves.
+"""
+
+import numpy as np
+from scipy import ndimage
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import breadth_first_order, minimum_spanning_tree
+
+from .erosion import NEIGHBOURS, NEIGHBOUR_DISTANCES
+
+
+def _pointer_jump(parent, values, op):
+    """
+    Combine values along every path up a forest of parent pointers.
+
+    Each round doubles the distance every pointer skips, so paths of length L
+    take log2(L) vectorized rounds instead of a Python loop per cell.
+
+    Args:
+        parent (np.ndarray): Parent of every node, roots point to themselves.
+        values (np.ndarray): Value of the edge from each node to its parent;
+                             roots hold the identity of op.
+        op (np.ufunc): Associative ufunc, e.g. np.add or np.maximum.
+    Returns:
+        tuple: The root of every node and op over the edges on its path there.
+    """
+    # The gathers dominate, so use 32 bit pointers whenever they fit
+    index_type = np.int32 if len(parent) < 1 << 31 else np.intp
+    parent = parent.astype(index_type)
+    values = values.copy()
+    while True:
+        grand = parent[parent]
+        if np.array_equal(grand, parent):
+            return parent, values
+        op(values, values[parent], out=values)
+        parent = grand
+
+
+def d8_receivers(heights):
+    """
+    Steepest descent (D8) receiver of every cell.
+
+    Args:
+        heights (np.ndarray): 2D heightmap.
+    Returns:
+        np.ndarray: Flat receiver index per cell. Cells on the border and
+                    interior pits without a lower neighbour drain into
+                    themselves.
+    """
+    h, w = heights.shape
+    padded = np.full((h + 2, w + 2), np.inf, dtype=np.float32)
+    padded[1:-1, 1:-1] = heights
+
+    # Direction 0 means no lower neighbour, k + 1 the k-th neighbour
+    best = np.zeros((h, w), dtype=np.float32)
+    slope = np.empty((h, w), dtype=np.float32)
+    steeper = np.empty((h, w), dtype=bool)
+    direction = np.zeros((h, w), dtype=np.int8)
+    for k, ((dy, dx), dist) in enumerate(zip(NEIGHBOURS, NEIGHBOUR_DISTANCES)):
+        np.subtract(
+            heights, padded[1 + dy : h + 1 + dy, 1 + dx : w + 1 + dx], out=slope
+        )
+        slope /= dist
+        np.greater(slope, best, out=steeper)
+        np.copyto(best, slope, where=steeper)
+        np.copyto(direction, k + 1, where=steeper)
+
+    direction[[0, -1], :] = 0
+    direction[:, [0, -1]] = 0
+    offsets = np.array([0] + [dy * w + dx for dy, dx in NEIGHBOURS])
+    return np.arange(h * w) + offsets[direction.ravel()]
+
+
+def _basin_passes(heights, basins, n_basins):
+    """
+    Lowest pass between every pair of adjacent basins.
+
+    Returns:
+        tuple: Arrays (basin_a, basin_b, height, cell_a, cell_b), one entry per
+               adjacent pair with cell_a in basin_a and cell_b in basin_b the
+               neighbouring cells forming the pass.
+    """
+    h, w = heights.shape
+    flat = heights.ravel()
+    grid = basins.reshape(h, w)
+    # Each neighbour pair once: east, south, south-east and south-west
+    cell_a, cell_b = [], []
+    for dy, dx in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+        c0, c1 = max(0, -dx), w - max(0, dx)
+        crossing = grid[: h - dy, c0:c1] != grid[dy:, c0 + dx : c1 + dx]
+        rows, cols = np.nonzero(crossing)
+        a = rows * w + cols + c0
+        cell_a.append(a)
+        cell_b.append(a + dy * w + dx)
+    cell_a, cell_b = np.concatenate(cell_a), np.concatenate(cell_b)
+
+    # Orient every pair from the lower to the higher basin label
+    swap = basins[cell_a] > basins[cell_b]
+    cell_a[swap], cell_b[swap] = cell_b[swap], cell_a[swap]
+    basin_a, basin_b = basins[cell_a], basins[cell_b]
+    pass_height = np.maximum(flat[cell_a], flat[cell_b])
+
+    # Keep the lowest crossing of every basin pair: group the crossings by
+    # pair, then take the first one at the minimum height of its group
+    key = basin_a.astype(np.int64) * n_basins + basin_b
+    order = np.argsort(key)
+    key, pass_sorted = key[order], pass_height[order]
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+    group_min = np.minimum.reduceat(pass_sorted, starts)
+    group = np.cumsum(np.r_[False, key[1:] != key[:-1]])
+    at_min = np.flatnonzero(pass_sorted == group_min[group])
+    first = np.r_[True, group[at_min[1:]] != group[at_min[:-1]]]
+    lowest = order[at_min[first]]
+    return (
+        basin_a[lowest],
+        basin_b[lowest],
+        pass_height[lowest],
+        cell_a[lowest],
+        cell_b[lowest],
+    )
+
+
+def route_depressions(heights, receivers=None):
+    """
+    Fill depressions and route their flow out over the lowest pass.
+
+    The cells are grouped into the basins of their D8 pits, with all basins
+    draining off the border merged into one outlet basin. A minimum spanning
+    tree of the basins connected by their lowest passes gives the spill route
+    of every depression, and its water level is the highest pass on that
+    route. The result matches priority-flood filling, but the heap only ever
+    sees the basin graph, inside scipy's Kruskal implementation, instead of
+    every cell.
+
+    Args:
+        heights (np.ndarray): 2D heightmap.
+        receivers (np.ndarray): D8 receivers of heights, computed if omitted.
+    Returns:
+        tuple: (receivers, filled) where every pit drains over its pass into
+               the neighbouring basin, and filled holds the heights with
+               depressions filled up to their water level.
+    """
+    h, w = heights.shape
+    flat = heights.ravel()
+    if receivers is None:
+        receivers = d8_receivers(heights)
+    receivers = receivers.copy()
+
+    pits, _ = _pointer_jump(receivers, np.zeros(h * w, dtype=np.int8), np.add)
+    outlets = np.flatnonzero(receivers == np.arange(h * w))
+    on_border = np.zeros(h * w, dtype=bool)
+    on_border.reshape(h, w)[[0, -1], :] = True
+    on_border.reshape(h, w)[:, [0, -1]] = True
+
+    # Basin 0 collects everything draining off the map
+    pit_cells = outlets[~on_border[outlets]]
+    basin_of_pit = np.zeros(h * w, dtype=np.int64)
+    basin_of_pit[pit_cells] = np.arange(1, len(pit_cells) + 1)
+    basins = basin_of_pit[pits]
+    n_basins = len(pit_cells) + 1
+    if n_basins == 1:
+        return receivers, heights.copy()
+
+    basin_a, basin_b, pass_height, cell_a, cell_b = _basin_passes(
+        heights, basins, n_basins
+    )
+
+    # Kruskal ignores zero weights, so shift the passes to be positive
+    weights = pass_height - pass_height.min() + 1
+    graph = coo_matrix((weights, (basin_a, basin_b)), shape=(n_basins, n_basins))
+    tree = minimum_spanning_tree(graph.tocsr())
+    _, parent = breadth_first_order(tree, 0, directed=False)
+    parent[0] = 0
+
+    # Look up the pass on the tree edge from every basin to its parent
+    edge_key = basin_a.astype(np.int64) * n_basins + basin_b
+    order = np.argsort(edge_key)
+    child = np.arange(1, n_basins)
+    lo = np.minimum(child, parent[1:])
+    hi = np.maximum(child, parent[1:])
+    edge = order[np.searchsorted(edge_key, lo * n_basins + hi, sorter=order)]
+    spill = np.where(child == lo, cell_b[edge], cell_a[edge])
+
+    # Pits drain into the cell across their pass
+    receivers[pit_cells] = spill
+
+    # The water level of a basin is the highest pass on its way to the border
+    level = np.full(n_basins, -np.inf)
+    level[1:] = pass_height[edge]
+    _, level = _pointer_jump(parent, level, np.maximum)
+    filled = np.maximum(flat, level[basins]).reshape(h, w)
+    return receivers, filled.astype(heights.dtype)
+
+
+def fill_depressions(heights):
+    """
+    Raise every depression of a heightmap to the level where it spills over.
+
+    Args:
+        heights (np.ndarray): 2D heightmap.
+    Returns:
+        np.ndarray: Filled heightmap; cells above their original height are
+                    lakes.
+    """
+    return route_depressions(heights)[1]
+
+
+def flow_accumulation(receivers, weights=None):
+    """
+    Total upstream area draining through every cell.
+
+    Cells are ordered by their number of steps to an outlet and processed from
+    the farthest level down, each level passing its flow to the next one in a
+    single vectorized scatter.
+
+    Args:
+        receivers (np.ndarray): Flat receiver index per cell, without cycles
+                                other than outlets draining into themselves.
+        weights (np.ndarray): Optional runoff per cell, 1 by default.
+    Returns:
+        np.ndarray: Flat accumulated flow per cell, including its own runoff.
+    """
+    n = len(receivers)
+    index = np.arange(n)
+    flow = np.ones(n) if weights is None else np.asarray(weights, float).ravel()
+    flow = flow.copy()
+
+    steps = (receivers != index).astype(np.int32)
+    _, depth = _pointer_jump(receivers, steps, np.add)
+
+    # Stable sorts of 16 bit integers are radix sorts
+    if depth.max() < 1 << 16:
+        depth = depth.astype(np.uint16)
+    order = np.argsort(depth, kind="stable")
+    bounds = np.cumsum(np.bincount(depth))
+    for d in range(len(bounds) - 1, 0, -1):
+        cells = order[bounds[d - 1] : bounds[d]]
+        np.add.at(flow, receivers[cells], flow[cells])
+    return flow
+
+
+def analyze_drainage(heights):
+    """
+    Route the flow of a heightmap over its filled depressions.
+
+    Args:
+        heights (np.ndarray): 2D heightmap.
+    Returns:
+        tuple: (receivers, filled, flow) from route_depressions, with the
+               accumulated flow reshaped like the heightmap.
+    """
+    receivers, filled = route_depressions(heights)
+    flow = flow_accumulation(receivers).reshape(heights.shape)
+    return receivers, filled, flow
+
+
+def add_rivers(
+    noise,
+    river_threshold=0.002,
+    river_depth=0.05,
+    river_width=1.0,
+    fill_lakes=True,
+    drainage=None,
+):
+    """
+    Carve rivers into a heightmap along its accumulated drainage.
+
+    Args:
+        noise (np.ndarray): 2D heightmap, modified in place.
+        river_threshold (float): Fraction of the map that must drain through a
+                                 cell for it to carry a river.
+        river_depth (float): Depth of the largest river, relative to the height
+                             range of the map.
+        river_width (float): Width in cells over which the riverbeds are
+                             smoothed into the banks.
+        fill_lakes (bool): Flatten depressions to their water level.
+        drainage (tuple): Optional analyze_drainage(noise), e.g. shared with
+                          the erosion that follows.
+    Returns:
+        np.ndarray: The heightmap with rivers and lakes.
+    """
+    h, w = noise.shape
+    if drainage is None:
+        drainage = analyze_drainage(noise)
+    _, filled, flow = drainage
+
+    # River depth grows with the log of the drained area past the threshold
+    threshold = max(river_threshold * h * w, 1.0)
+    strength = np.log(np.maximum(flow / threshold, 1.0))
+    if strength.max() > 0:
+        strength /= strength.max()
+    if river_width > 0:
+        strength = ndimage.gaussian_filter(strength, river_width)
+
+    carve = river_depth * np.ptp(filled) * strength
+    if fill_lakes:
+        # Lakes keep a flat surface, rivers end where they flow into them
+        lakes = filled > noise
+        noise[...] = filled
+        carve[lakes] = 0
+    noise -= carve.astype(noise.dtype)
+    return noise
@@ -3,11 +3,357 @@ Perlin noise terrain generation implementation.
 """
 
 import time
+from functools import lru_cache
 
 import numpy as np
 
+from .fractal import generate_fractal_noise, octave_parameters
 
-def domain_warp(
+# Number of elements processed per band when all octaves are stacked
+FRACTAL_CHUNK_ELEMENTS = 1 << 16
+
+# 8 possible gradient directions shared by the Perlin and Simplex lattices
+GRADIENTS = np.array(
+    [[0, 1], [0, -1], [1, 0], [-1, 0], [1, 1], [-1, 1], [1, -1], [-1, -1]]
+)
+
+F2 = 0.5 * (np.sqrt(3.0) - 1.0)
+G2 = (3.0 - np.sqrt(3.0)) / 6.0
+
+
+class NoiseSampler:
+    """
+    Seeded gradient noise sampler with precomputed lookup tables.
+
+    The permutation and gradient tables are built once on construction, so
+    repeated calls (fractal octaves, domain warp iterations) skip the table setup
+    and always return the same values for the same seed.
+
+    Args:
+        seed (int): Seed for the permutation table.
+        dtype (np.dtype): Floating point type of the returned noise.
+        size (int): Number of lattice cells before the pattern repeats,
+                    must be a power of two no larger than 65536.
+        channels (int): Number of independent noise channels. Channel c uses the
+                        permutation of seed + c, and inputs then carry a leading
+                        channel axis so all channels are sampled in one call.
+    """
+
+    def __init__(self, seed=0, dtype=np.float32, size=256, channels=1):
+        if size <= 0 or size & (size - 1) or size > 1 << 16:
+            raise ValueError("Table size must be a power of two <= 65536.")
+        self.seed = seed
+        self.dtype = np.dtype(dtype)
+        self.size = size
+        self.mask = size - 1
+        self.channels = channels
+
+        # Doubled permutation so perm[perm[x] + y] never needs a second modulo,
+        # with the tables of all channels laid out back to back
+        perms = []
+        for c in range(channels):
+            perm = np.random.RandomState(seed + c).permutation(size).astype(np.uint16)
+            perms += [perm, perm]
+        self.perm = np.concatenate(perms)
+        self.grad_x = GRADIENTS[:, 0].astype(self.dtype)
+        self.grad_y = GRADIENTS[:, 1].astype(self.dtype)
+
+    def _lattice(self, x):
+        """Split coordinates into wrapped lattice indices and fractional offsets."""
+        x = np.asarray(x)
+        floor = np.floor(x)
+        frac = (x - floor).astype(self.dtype, copy=False)
+        idx = floor.astype(np.int32)
+        idx &= self.mask
+        return idx, frac
+
+    def _channel_base(self, *arrays):
+        """Offset of each channel's table, broadcastable against the inputs."""
+        if self.channels == 1:
+            return 0
+        ndim = max(np.ndim(a) for a in arrays)
+        base = np.arange(self.channels, dtype=np.int32) * (2 * self.size)
+        return base.reshape((self.channels,) + (1,) * (ndim - 1))
+
+    def _gradient(self, h, x, y):
+        """Dot product of the hashed gradient with the (x, y) offset."""
+        h = h & 7
+        return self.grad_x[h] * x + self.grad_y[h] * y
+
+    def _perlin_corners(self, x, y):
+        """Hash the four lattice corners around each sample."""
+        # Everything up to the second level hash keeps the shape of its input,
+        # so separable (1, width) and (height, 1) inputs stay O(height + width)
+        perm = self.perm
+        xi, sx = self._lattice(x)
+        yi, sy = self._lattice(y)
+        base = self._channel_base(xi, yi)
+        xi = xi + base
+
+        # Hash grid corners
+        a = perm[xi] + base
+        b = perm[xi + 1] + base
+        hashes = (perm[a + yi], perm[b + yi], perm[a + yi + 1], perm[b + yi + 1])
+        return hashes, sx, sy
+
+    def perlin(self, x, y):
+        """
+        Generate a 2D Perlin noise array.
+        Args:
+            x (np.ndarray): Grid of samples for the x-axis
+            y (np.ndarray): Grid of samples for the y-axis
+        Returns:
+            np.ndarray: 2D array of Perlin noise values in range [-1, 1].
+        """
+        (h00, h10, h01, h11), sx, sy = self._perlin_corners(x, y)
+        n00 = self._gradient(h00, sx, sy)
+        n10 = self._gradient(h10, sx - 1, sy)
+        n01 = self._gradient(h01, sx, sy - 1)
+        n11 = self._gradient(h11, sx - 1, sy - 1)
+
+        # Interpolate
+        u = fade(sx)
+        v = fade(sy)
+        nx0 = lerp(n00, n10, u)
+        nx1 = lerp(n01, n11, u)
+        return lerp(nx0, nx1, v)
+
+    def perlin_deriv(self, x, y):
+        """
+        Generate a 2D Perlin noise array and its analytic partial derivatives.
+        Args:
+            x (np.ndarray): Grid of samples for the x-axis
+            y (np.ndarray): Grid of samples for the y-axis
+        Returns:
+            tuple: Arrays (value, d/dx, d/dy) with respect to the sample coordinates.
+        """
+        (h00, h10, h01, h11), sx, sy = self._perlin_corners(x, y)
+        g00x, g00y = self.grad_x[h00 & 7], self.grad_y[h00 & 7]
+        g10x, g10y = self.grad_x[h10 & 7], self.grad_y[h10 & 7]
+        g01x, g01y = self.grad_x[h01 & 7], self.grad_y[h01 & 7]
+        g11x, g11y = self.grad_x[h11 & 7], self.grad_y[h11 & 7]
+        n00 = g00x * sx + g00y * sy
+        n10 = g10x * (sx - 1) + g10y * sy
+        n01 = g01x * sx + g01y * (sy - 1)
+        n11 = g11x * (sx - 1) + g11y * (sy - 1)
+
+        u = fade(sx)
+        v = fade(sy)
+        du = fade_deriv(sx)
+        dv = fade_deriv(sy)
+        nx0 = lerp(n00, n10, u)
+        nx1 = lerp(n01, n11, u)
+
+        # Product rule through both interpolation levels
+        dx0 = lerp(g00x, g10x, u) + du * (n10 - n00)
+        dx1 = lerp(g01x, g11x, u) + du * (n11 - n01)
+        dy0 = lerp(g00y, g10y, u)
+        dy1 = lerp(g01y, g11y, u)
+        value = lerp(nx0, nx1, v)
+        ddx = lerp(dx0, dx1, v)
+        ddy = lerp(dy0, dy1, v) + dv * (nx1 - nx0)
+        return value, ddx, ddy
+
+    def perlin_grid(self, lin_x, lin_y):
+        """
+        Generate a 2D Perlin noise array over the axis-aligned grid of lin_x and lin_y.
+
+        Floors, fractional parts, fade curves and the first level hash are
+        computed per axis in O(height + width); only the corner gradients and
+        interpolation run on the full grid. Equal to perlin(*np.meshgrid(lin_x, lin_y)).
+        Args:
+            lin_x (np.ndarray): 1D samples along the x-axis (width)
+            lin_y (np.ndarray): 1D samples along the y-axis (height)
+        Returns:
+            np.ndarray: 2D array of shape (height, width) in range [-1, 1].
+        """
+        return self.perlin(
+            np.asarray(lin_x)[np.newaxis, :], np.asarray(lin_y)[:, np.newaxis]
+        )
+
+    def _simplex_corners(self, x, y):
+        """Hash the three simplex corners around each sample and their offsets."""
+        perm = self.perm
+        x = np.asarray(x)
+        y = np.asarray(y)
+
+        # Skew points to grid
+        s = (x + y) * F2
+        i = np.floor(x + s)
+        j = np.floor(y + s)
+
+        # Get simplex points
+        t = (i + j) * G2
+        x0 = (x - i + t).astype(self.dtype, copy=False)
+        y0 = (y - j + t).astype(self.dtype, copy=False)
+
+        # Determine upper/lower simplex
+        i1 = x0 > y0
+        j1 = ~i1
+
+        x1 = x0 - i1 + self.dtype.type(G2)
+        y1 = y0 - j1 + self.dtype.type(G2)
+        x2 = x0 + self.dtype.type(2.0 * G2 - 1.0)
+        y2 = y0 + self.dtype.type(2.0 * G2 - 1.0)
+
+        ii = i.astype(np.int32)
+        ii &= self.mask
+        jj = j.astype(np.int32)
+        jj &= self.mask
+        base = self._channel_base(ii, jj)
+        ii = ii + base
+        jj = jj + base
+
+        gi0 = perm[ii + perm[jj]]
+        gi1 = perm[ii + i1 + perm[jj + j1]]
+        gi2 = perm[ii + 1 + perm[jj + 1]]
+        return (gi0, x0, y0), (gi1, x1, y1), (gi2, x2, y2)
+
+    def simplex(self, x, y):
+        """
+        Generate a 2D Simplex noise array.
+
+        Args:
+            x (np.ndarray): Grid of samples for the x-axis
+            y (np.ndarray): Grid of samples for the y-axis
+
+        Returns:
+            np.ndarray: 2D array of Simplex noise values normalized to the range [-1, 1].
+        """
+        corners = self._simplex_corners(x, y)
+        noise = np.zeros(np.broadcast(*corners[0][1:]).shape, dtype=self.dtype)
+        for gi, cx, cy in corners:
+            falloff = 0.5 - cx * cx - cy * cy
+            np.maximum(falloff, 0, out=falloff)
+            falloff *= falloff
+            falloff *= falloff
+            noise += self._gradient(gi, cx, cy) * falloff
+
+        noise *= 40
+        return noise
+
+    def simplex_deriv(self, x, y):
+        """
+        Generate a 2D Simplex noise array and its analytic partial derivatives.
+
+        Args:
+            x (np.ndarray): Grid of samples for the x-axis
+            y (np.ndarray): Grid of samples for the y-axis
+
+        Returns:
+            tuple: Arrays (value, d/dx, d/dy) with respect to the sample coordinates.
+        """
+        corners = self._simplex_corners(x, y)
+        shape = np.broadcast(*corners[0][1:]).shape
+        noise = np.zeros(shape, dtype=self.dtype)
+        ddx = np.zeros(shape, dtype=self.dtype)
+        ddy = np.zeros(shape, dtype=self.dtype)
+        for gi, cx, cy in corners:
+            gx, gy = self.grad_x[gi & 7], self.grad_y[gi & 7]
+            dot = gx * cx + gy * cy
+            t = 0.5 - cx * cx - cy * cy
+            np.maximum(t, 0, out=t)
+            t2 = t * t
+            t4 = t2 * t2
+            noise += dot * t4
+            # d/dp (t^4 (g . d)) = t^4 g - 8 t^3 (g . d) d
+            dt = -8 * t2 * t * dot
+            ddx += t4 * gx + dt * cx
+            ddy += t4 * gy + dt * cy
+
+        noise *= 40
+        ddx *= 40
+        ddy *= 40
+        return noise, ddx, ddy
+
+    def ridge(self, x, y, p=1.0):
+        """
+        Generate a 2D Ridge noise array.
+
+        Args:
+            x (np.ndarray): Grid of samples for the x-axis
+            y (np.ndarray): Grid of samples for the y-axis
+            p (float): Exponent factor to determine sharpness of ridges.
+        Returns:
+            np.ndarray: 2D array of Ridge noise values normalized to the range [-1, 1].
+        """
+        noise = self.perlin(x, y)
+        noise = np.power(1 - np.abs(noise), p)
+
+        return noise - (np.max(noise) - np.min(noise)) / 2
+
+    def billow(self, x, y, p=1.7):
+        """
+        Generate a 2D Billow noise array.
+
+        Args:
+            x (np.ndarray): Grid of samples for the x-axis
+            y (np.ndarray): Grid of samples for the y-axis
+            p (float): Exponent factor to adjust the softness of peaks.
+        Returns:
+            np.ndarray: 2D array of Billow noise values normalized to the range [-1, 1].
+        """
+        return np.abs(self.perlin(x, y)) ** p
+
+
+def lerp(a, b, t):
+    """Linear interpolation."""
+    return a + t * (b - a)
+
+
+def fade(t):
+    """Perlin's quintic fade curve 6t^5 - 15t^4 + 10t^3."""
+    return t * t * t * (t * (t * 6 - 15) + 10)
+
+
+def fade_deriv(t):
+    """Derivative of the fade curve, 30t^2 (t - 1)^2."""
+    return 30 * (t * (t - 1)) ** 2
+
+
+@lru_cache(maxsize=32)
+def _cached_sampler(seed, dtype, channels):
+    return NoiseSampler(seed, dtype, channels=channels)
+
+
+def get_sampler(seed=0, dtype=np.float32, channels=1):
+    """
+    Return a shared NoiseSampler for the given seed.
+
+    Samplers are cached so the module level noise functions only build their
+    tables once per seed. A seed of None picks a time based seed.
+    """
+    if seed is None:
+        seed = int(time.time())
+    return _cached_sampler(seed, np.dtype(dtype), channels)
+
+
+def grid_axes(shape, scale, offset=(0.0, 0.0), zoom=1.0, window=None):
+    """
+    Compute the 1D sample coordinates of a (height, width) noise grid.
+
+    Args:
+        shape (tuple): Shape (height, width) of the full grid.
+        scale (float): Extent of the sampled region before zooming.
+        offset (tuple): (x, y) offset to shift the sampled region.
+        zoom (float): Zoom factor; >1 zooms in, <1 zooms out.
+        window (tuple): Optional ((row_start, row_stop), (col_start, col_stop))
+                        sub-region of the grid to return coordinates for.
+
+    Returns:
+        tuple: 1D arrays (lin_x, lin_y). Values only depend on the global
+               row/column index, so every window of the grid samples exactly
+               the same coordinates as the full grid.
+    """
+    h, w = shape
+    (r0, r1), (c0, c1) = window if window is not None else ((0, h), (0, w))
+    # Same arithmetic as np.linspace(0, scale / zoom, n, endpoint=False)
+    lin_x = np.arange(c0, c1, dtype=np.float64) * ((scale / zoom) / w) + offset[0]
+    lin_y = np.arange(r0, r1, dtype=np.float64) * ((scale / zoom) / h) + offset[1]
+    return lin_x, lin_y
+
+
+def warp_field(
     shape=(100, 100),
     scale=10,
     offset=(0.0, 0.0),
@@ -15,9 +361,18 @@ def domain_warp(
     warps=0,
     strength=0.6,
     falloff=0.5,
+    warp_octaves=4,
+    seed=0,
+    window=None,
+    out=None,
 ):
     """
-    Perform domain warping on a 2D coordinate grid with multiple iterations.
+    Compute the domain warp displacement of a 2D coordinate grid.
+
+    The field only depends on the base grid, so it can be computed once and
+    applied to every octave of a fractal sum with apply_warp. The x and y
+    channels are independent noise seeded with seed and seed + 1, sampled
+    together in one batched call.
 
     Args:
         shape (tuple): Output shape (height, width) of the warped grid.
@@ -28,176 +383,183 @@ def domain_warp(
         warps (int): Number of times to apply domain warping.
         strength (float): Initial strength of the warping applied to the coordinates.
         falloff (float): Factor by which the warp strength decreases in each iteration.
+        warp_octaves (int): Number of octaves of the warp noise.
+        seed (int): Seed of the x warp noise, the y warp noise uses seed + 1.
+        window (tuple): Optional ((row_start, row_stop), (col_start, col_stop))
+                        region of the grid to warp.
+        out (np.ndarray): Optional float32 buffer of shape (2, height, width)
+                          reused to hold the displacement.
 
     Returns:
-        tuple: Two 2D arrays (x, y) representing the warped coordinates.
+        tuple: Displacements (dx, dy) as 2D arrays, or 0.0 for both without warps.
     """
-    h, w = shape
-    # Initialize coordinates
-    lin_x = np.linspace(0, scale / zoom, w, endpoint=False) + offset[0]
-    lin_y = np.linspace(0, scale / zoom, h, endpoint=False) + offset[1]
-    x, y = np.meshgrid(lin_x, lin_y)
-
-    # Apply domain warping for warps iterations
+    if not warps:
+        return 0.0, 0.0
+
+    rows, cols = window if window is not None else ((0, shape[0]), (0, shape[1]))
+    if out is None:
+        out = np.empty((2, rows[1] - rows[0], cols[1] - cols[0]), dtype=np.float32)
+    _fractal_perlin_into(
+        out,
+        get_sampler(seed, channels=2),
+        shape,
+        scale,
+        warp_octaves,
+        0.5,
+        2.0,
+        offset,
+        zoom,
+        window,
+    )
+
+    # Every iteration samples the warp noise on the same base grid, so the
+    # iterations only add up their strengths
+    total_strength = 0.0
     for i in range(warps):
-        warp_noise_x = generate_fractal_perlin_noise(
-            shape=shape, scale=scale, offset=offset, zoom=zoom
-        )
-        warp_noise_y = generate_fractal_perlin_noise(
-            shape=shape, scale=scale, offset=offset, zoom=zoom
-        )
-
-        warp_noise_x = (warp_noise_x + 1) / 2 - 0.5
-        warp_noise_y = (warp_noise_y + 1) / 2 - 0.5
-
-        x += strength * warp_noise_x
-        y += strength * warp_noise_y
+        total_strength += strength
         strength *= falloff
 
-    return x, y
+    # Map the noise from [-1, 1] to [-0.5, 0.5] and scale it in place
+    out *= 0.5 * total_strength
+    return out[0], out[1]
 
 
-def generate_perlin_noise(x, y):
+def apply_warp(
+    displacement,
+    shape=(100, 100),
+    scale=10,
+    offset=(0.0, 0.0),
+    zoom=1.0,
+    frequency=1.0,
+    window=None,
+    dtype=np.float32,
+):
     """
-    Generate a 2D Perlin noise array.
+    Displace the coordinates of a 2D grid by a precomputed warp field.
+
     Args:
-        x (np.ndarray): Grid of samples for the x-axis
-        y (np.ndarray): Grid of samples for the y-axis
+        displacement (tuple): (dx, dy) returned by warp_field.
+        shape (tuple): Output shape (height, width) of the warped grid.
+        scale (float): Scale of the sampled region.
+        offset (tuple): (x, y) offset to shift the sampled region.
+        zoom (float): Zoom factor; >1 zooms in, <1 zooms out.
+        frequency (float): Frequency of the sampled octave relative to the grid
+                           the field was computed on. The displacement is scaled
+                           by it so every octave is warped by the same amount.
+        window (tuple): Optional ((row_start, row_stop), (col_start, col_stop))
+                        region of the grid, matching the window of the field.
+        dtype (np.dtype): Floating point type of the returned coordinates.
+
     Returns:
-        np.ndarray: 2D array of Perlin noise values in range [-1, 1].
+        tuple: Two arrays (x, y) representing the warped coordinates. Without
+               warps no grid is materialized: x has shape (1, width) and y has
+               shape (height, 1), which broadcast against each other.
     """
+    dx, dy = displacement
+    lin_x, lin_y = grid_axes(shape, scale, offset, zoom, window)
+    lin_x, lin_y = lin_x.astype(dtype), lin_y.astype(dtype)
+    x = lin_x[np.newaxis, :] + frequency * dx
+    y = lin_y[:, np.newaxis] + frequency * dy
+    return x, y
 
-    def lerp(a, b, t):
-        return a + t * (b - a)
-
-    def fade(t):
-        return 6 * t**5 - 15 * t**4 + 10 * t**3
 
-    def gradient(h, x, y):
-        """Convert hash value to gradient and compute dot product with (x, y) offset."""
-        # 8 possible directions
-        vectors = np.array(
-            [[0, 1], [0, -1], [1, 0], [-1, 0], [1, 1], [-1, 1], [1, -1], [-1, -1]]
-        )
-        g = vectors[h % 8]
-        return g[..., 0] * x + g[..., 1] * y
+def domain_warp(
+    shape=(100, 100),
+    scale=10,
+    offset=(0.0, 0.0),
+    zoom=1.0,
+    warps=0,
+    strength=0.6,
+    falloff=0.5,
+    warp_octaves=4,
+    seed=0,
+    window=None,
+):
+    """
+    Perform domain warping on a 2D coordinate grid with multiple iterations.
 
-    # Integer part (grid coordinates)
-    x0 = x.astype(int)
-    y0 = y.astype(int)
-    x1 = x0 + 1
-    y1 = y0 + 1
+    Args:
+        shape (tuple): Output shape (height, width) of the warped grid.
+        scale (float): Scale of the base noise used for warping
+                       (higher = more detail, smaller features).
+        offset (tuple): (x, y) offset to shift the sampled region.
+        zoom (float): Zoom factor for the noise; >1 zooms in, <1 zooms out.
+        warps (int): Number of times to apply domain warping.
+        strength (float): Initial strength of the warping applied to the coordinates.
+        falloff (float): Factor by which the warp strength decreases in each iteration.
+        warp_octaves (int): Number of octaves of the warp noise.
+        seed (int): Seed of the x warp noise, the y warp noise uses seed + 1.
+        window (tuple): Optional ((row_start, row_stop), (col_start, col_stop))
+                        region of the grid to warp.
 
-    # Fractional part
-    sx = x - x0
-    sy = y - y0
+    Returns:
+        tuple: Two 2D arrays (x, y) representing the warped coordinates. Without
+               warps no grid is materialized: x has shape (1, width) and y has
+               shape (height, 1), which broadcast against each other.
+    """
+    displacement = warp_field(
+        shape, scale, offset, zoom, warps, strength, falloff, warp_octaves, seed, window
+    )
+    return apply_warp(displacement, shape, scale, offset, zoom, window=window)
 
-    # Permutation table
-    rng = np.random.RandomState(int(time.time()))
-    perm = rng.permutation(256)
-    perm = np.stack([perm, perm]).flatten()
 
-    def hash_coords(xi, yi):
-        return perm[(perm[xi % 256] + yi) % 256]
+def generate_perlin_noise(x, y, seed=0):
+    """
+    Generate a 2D Perlin noise array.
+    Args:
+        x (np.ndarray): Grid of samples for the x-axis
+        y (np.ndarray): Grid of samples for the y-axis
+        seed (int): Seed of the permutation table.
+    Returns:
+        np.ndarray: 2D array of Perlin noise values in range [-1, 1].
+    """
+    return get_sampler(seed).perlin(x, y)
 
-    # Hash grid corners
-    n00 = gradient(hash_coords(x0, y0), sx, sy)
-    n10 = gradient(hash_coords(x1, y0), sx - 1, sy)
-    n01 = gradient(hash_coords(x0, y1), sx, sy - 1)
-    n11 = gradient(hash_coords(x1, y1), sx - 1, sy - 1)
 
-    # Interpolate
-    u = fade(sx)
-    v = fade(sy)
-    nx0 = lerp(n00, n10, u)
-    nx1 = lerp(n01, n11, u)
-    nxy = lerp(nx0, nx1, v)
-    return nxy
+def generate_perlin_noise_deriv(x, y, seed=0):
+    """
+    Generate a 2D Perlin noise array with its analytic derivatives in one pass.
+    Args:
+        x (np.ndarray): Grid of samples for the x-axis
+        y (np.ndarray): Grid of samples for the y-axis
+        seed (int): Seed of the permutation table.
+    Returns:
+        tuple: Arrays (value, d/dx, d/dy) with respect to the sample coordinates.
+    """
+    return get_sampler(seed).perlin_deriv(x, y)
 
 
-def generate_simplex_noise(x, y):
+def generate_simplex_noise(x, y, seed=0):
     """
     Generate a 2D Simplex noise array.
 
     Args:
         x (np.ndarray): Grid of samples for the x-axis
         y (np.ndarray): Grid of samples for the y-axis
+        seed (int): Seed of the permutation table.
 
     Returns:
         np.ndarray: 2D array of Simplex noise values normalized to the range [-1, 1].
     """
+    return get_sampler(seed).simplex(x, y)
 
-    F2 = 0.5 * (np.sqrt(3.0) - 1.0)
-    G2 = (3.0 - np.sqrt(3.0)) / 6.0
 
-    def lerp(a, b, t):
-        """Linear interpolation."""
-        return a + t * (b - a)
+def generate_simplex_noise_deriv(x, y, seed=0):
+    """
+    Generate a 2D Simplex noise array with its analytic derivatives in one pass.
 
-    def gradient(h, x, y):
-        """Convert hash value to gradient and compute dot product with (x, y) offset."""
-        # 8 possible directions
-        vectors = np.array(
-            [[1, 1], [-1, 1], [1, -1], [-1, -1], [1, 0], [-1, 0], [0, 1], [0, -1]]
-        )
-        g = vectors[h % 8]
-        return g[..., 0] * x + g[..., 1] * y
-
-    # Skew points to grid
-    s = (x + y) * F2
-    i = np.floor(x + s).astype(int)
-    j = np.floor(y + s).astype(int)
-
-    # Get simplex points
-    t = (i + j) * G2
-    x0 = x - i + t
-    y0 = y - j + t
-
-    # Determine upper/lower simplex
-    i1 = (x0 > y0).astype(int)
-    j1 = 1 - i1
-
-    x1 = x0 - i1 + G2
-    y1 = y0 - j1 + G2
-    x2 = x0 - 1.0 + 2.0 * G2
-    y2 = y0 - 1.0 + 2.0 * G2
-
-    # Permutation table
-    rng = np.random.RandomState(int(time.time()))
-    perm = rng.permutation(256)
-    perm = np.stack([perm, perm]).flatten()
-
-    ii = np.mod(i, 256)
-    jj = np.mod(j, 256)
-
-    gi0 = perm[ii + perm[jj]]
-    gi1 = perm[ii + i1 + perm[jj + j1]]
-    gi2 = perm[ii + 1 + perm[jj + 1]]
-
-    n0 = gradient(gi0, x0, y0)
-    n1 = gradient(gi1, x1, y1)
-    n2 = gradient(gi2, x2, y2)
-
-    t0 = 0.5 - x0**2 - y0**2
-    t0 = np.maximum(0, t0)
-    t0 **= 4
-    n0 *= t0
-
-    t1 = 0.5 - x1**2 - y1**2
-    t1 = np.maximum(0, t1)
-    t1 **= 4
-    n1 *= t1
-
-    t2 = 0.5 - x2**2 - y2**2
-    t2 = np.maximum(0, t2)
-    t2 **= 4
-    n2 *= t2
-
-    noise = (n0 + n1 + n2) * 40
-    return noise
+    Args:
+        x (np.ndarray): Grid of samples for the x-axis
+        y (np.ndarray): Grid of samples for the y-axis
+        seed (int): Seed of the permutation table.
+
+    Returns:
+        tuple: Arrays (value, d/dx, d/dy) with respect to the sample coordinates.
+    """
+    return get_sampler(seed).simplex_deriv(x, y)
 
 
-def generate_ridge_noise(x, y, p=1.0):
+def generate_ridge_noise(x, y, p=1.0, seed=0):
     """
     Generate a 2D Ridge noise array.
 
@@ -205,16 +567,14 @@ def generate_ridge_noise(x, y, p=1.0):
         x (np.ndarray): Grid of samples for the x-axis
         y (np.ndarray): Grid of samples for the y-axis
         p (float): Exponent factor to determine sharpness of ridges.
+        seed (int): Seed of the permutation table.
     Returns:
         np.ndarray: 2D array of Ridge noise values normalized to the range [-1, 1].
     """
-    noise = generate_perlin_noise(x, y)
-    noise = np.power(1 - np.abs(noise), p)
-
-    return noise - (np.max(noise) - np.min(noise)) / 2
+    return get_sampler(seed).ridge(x, y, p)
 
 
-def generate_billow_noise(x, y, p=1.7):
+def generate_billow_noise(x, y, p=1.7, seed=0):
     """
     Generate a 2D Billow noise array.
 
@@ -222,16 +582,133 @@ def generate_billow_noise(x, y, p=1.7):
         x (np.ndarray): Grid of samples for the x-axis
         y (np.ndarray): Grid of samples for the y-axis
         p (float): Exponent factor to adjust the softness of peaks.
+        seed (int): Seed of the permutation table.
     Returns:
         np.ndarray: 2D array of Billow noise values normalized to the range [-1, 1].
     """
-    # Generate Perlin noise
-    noise = generate_perlin_noise(x, y)
+    return get_sampler(seed).billow(x, y, p)
 
-    # Apply Billow transformation
-    billow_noise = np.abs(noise) ** p
 
-    return billow_noise
+# Noise functions with an analytic derivative counterpart taking the same
+# parameters and returning (value, d/dx, d/dy)
+NOISE_DERIVATIVES = {
+    generate_perlin_noise: generate_perlin_noise_deriv,
+    generate_simplex_noise: generate_simplex_noise_deriv,
+}
+
+
+def generate_warped_noise(
+    shape=(100, 100),
+    scale=10,
+    offset=(0.0, 0.0),
+    zoom=1.0,
+    noisef=generate_perlin_noise,
+    warps=1,
+    strength=0.6,
+    falloff=0.5,
+    seed=0,
+    window=None,
+):
+    """
+    Sample a noise function on a domain warped grid.
+
+    Module level counterpart of warping then sampling, so it can be passed to
+    generate_fractal_noise and pickled for process pools.
+
+    Args:
+        shape (tuple): Output shape (height, width).
+        scale (float): Scale of the sampled region.
+        offset (tuple): (x, y) offset to shift the sampled region.
+        zoom (float): Zoom factor; >1 zooms in, <1 zooms out.
+        noisef (callable): Noise function taking x and y grids.
+        warps (int): Number of times to apply domain warping.
+        strength (float): Initial strength of the warping applied to the coordinates.
+        falloff (float): Factor by which the warp strength decreases in each iteration.
+        seed (int): Seed of the warp noise.
+        window (tuple): Optional ((row_start, row_stop), (col_start, col_stop))
+                        region of the grid to generate.
+    Returns:
+        np.ndarray: 2D array of warped noise values.
+    """
+    x, y = domain_warp(
+        shape, scale, offset, zoom, warps, strength, falloff, seed=seed, window=window
+    )
+    return noisef(x, y)
+
+
+def generate_warped_fractal_noise(
+    noisef=generate_perlin_noise,
+    shape=(100, 100),
+    scale=10,
+    offset=(0.0, 0.0),
+    zoom=1.0,
+    octaves=4,
+    persistence=0.5,
+    lacunarity=2.0,
+    warps=1,
+    strength=0.6,
+    falloff=0.5,
+    warp_octaves=4,
+    seed=0,
+    window=None,
+):
+    """
+    Generate fractal noise on a domain warped grid, warping once for all octaves.
+
+    The warp field is computed a single time on the base grid and every octave
+    samples noisef at its own coordinates displaced by that field, instead of
+    re-running the domain warp per octave.
+
+    Args:
+        noisef (callable): Noise function taking x and y grids.
+        shape (tuple): Output shape (height, width).
+        scale (float): Base scale (frequency) of the first octave.
+        offset (tuple): (x, y) offset to shift the sampled region.
+        zoom (float): Zoom factor; >1 zooms in, <1 zooms out.
+        octaves (int): Number of noise layers to sum.
+        persistence (float): Amplitude multiplier for each octave.
+        lacunarity (float): Frequency multiplier for each octave.
+        warps (int): Number of times to apply domain warping.
+        strength (float): Initial strength of the warping applied to the coordinates.
+        falloff (float): Factor by which the warp strength decreases in each iteration.
+        warp_octaves (int): Number of octaves of the warp noise.
+        seed (int): Seed of the warp noise.
+        window (tuple): Optional ((row_start, row_stop), (col_start, col_stop))
+                        region of the grid to generate.
+    Returns:
+        np.ndarray: 2D array of fractal noise values in range [-1, 1].
+    """
+    base_scale = scale / zoom
+    displacement = warp_field(
+        shape,
+        base_scale,
+        offset,
+        zoom,
+        warps,
+        strength,
+        falloff,
+        warp_octaves,
+        seed,
+        window,
+    )
+
+    def warped_octave(scale, offset, window=None):
+        x, y = apply_warp(
+            displacement, shape, scale, offset, zoom, scale / base_scale, window
+        )
+        return noisef(x, y)
+
+    return generate_fractal_noise(
+        warped_octave,
+        shape,
+        scale,
+        offset,
+        zoom,
+        octaves,
+        persistence,
+        lacunarity,
+        window=window,
+    )
 
 
 def generate_fractal_perlin_noise(
@@ -242,6 +719,9 @@ def generate_fractal_perlin_noise(
     lacunarity=2.0,
     offset=(0.0, 0.0),
     zoom=1.0,
+    seed=0,
+    window=None,
+    derivatives=False,
 ):
     """
     Generate a 2D fractal (FBM) Perlin noise array by summing multiple octaves.
@@ -253,35 +733,104 @@ def generate_fractal_perlin_noise(
         lacunarity (float): Frequency multiplier for each octave.
         offset (tuple): (x, y) offset to shift the sampled region (applied to all octaves, scaled by frequency).
         zoom (float): Zoom factor; >1 zooms in, <1 zooms out.
+        seed (int): Seed of the permutation table shared by all octaves.
+        window (tuple): Optional ((row_start, row_stop), (col_start, col_stop))
+                        region of the grid to generate, used for tiled output.
+        derivatives (bool): Also return the analytic derivatives of the sum.
     Returns:
         np.ndarray: 2D array of fractal Perlin noise values in range [-1, 1].
+                    With derivatives, a tuple (noise, d/dx, d/dy) where the
+                    derivatives are per grid cell along the columns (x) and
+                    rows (y), like np.gradient(noise)[::-1].
     """
-    w, h = shape
-
-    noise = np.zeros(shape, dtype=np.float32)
-    amplitude = 1.0
-    frequency = 1.0
-    max_amplitude = 0.0
-
-    for _ in range(octaves):
-
-        # Offset is scaled by frequency to allow zooming/panning
-        octave_offset = (offset[0] * frequency, offset[1] * frequency)
-        octave_scale = (scale * frequency) / zoom
-
-        # Initialize coordinates
-        lin_x = (
-            np.linspace(0, octave_scale / zoom, w, endpoint=False) + octave_offset[0]
-        )
-        lin_y = (
-            np.linspace(0, octave_scale / zoom, h, endpoint=False) + octave_offset[1]
-        )
-        x, y = np.meshgrid(lin_x, lin_y)
+    rows, cols = window if window is not None else ((0, shape[0]), (0, shape[1]))
+    noise = np.empty((rows[1] - rows[0], cols[1] - cols[0]), dtype=np.float32)
+    gradient = np.empty((2,) + noise.shape, dtype=np.float32) if derivatives else None
+    _fractal_perlin_into(
+        noise,
+        get_sampler(seed),
+        shape,
+        scale,
+        octaves,
+        persistence,
+        lacunarity,
+        offset,
+        zoom,
+        window,
+        gradient,
+    )
+    if derivatives:
+        return noise, gradient[0], gradient[1]
+    return noise
 
-        noise += amplitude * generate_perlin_noise(x, y)
 
-        max_amplitude += amplitude
-        amplitude *= persistence
-        frequency *= lacunarity
-    noise /= max_amplitude
-    return noise
+def _fractal_perlin_into(
+    out,
+    sampler,
+    shape,
+    scale,
+    octaves,
+    persistence,
+    lacunarity,
+    offset,
+    zoom,
+    window,
+    gradient_out=None,
+):
+    """
+    Write fractal Perlin noise into out, shaped (height, width) or
+    (channels, height, width) for a multi-channel sampler. If gradient_out is
+    given, the per grid cell (d/dx, d/dy) of the sum is written into it.
+    """
+    h, w = out.shape[-2:]
+    scales, offsets, amplitudes, max_amplitude = octave_parameters(
+        scale, offset, zoom, octaves, persistence, lacunarity
+    )
+    out.fill(0)
+    if gradient_out is not None:
+        gradient_out.fill(0)
+    if octaves == 0:
+        out.fill(np.nan)
+        return out
+
+    # Chain rule factor from sample coordinates to grid cells of each octave
+    steps_x = [(s / zoom) / shape[1] for s in scales]
+    steps_y = [(s / zoom) / shape[0] for s in scales]
+
+    # Stacked (octaves, width) and (octaves, height) coordinates of every octave
+    axes = [grid_axes(shape, s, o, zoom, window) for s, o in zip(scales, offsets)]
+    lin_x = np.stack([ax[0] for ax in axes])[:, np.newaxis, :]
+    lin_y = np.stack([ax[1] for ax in axes])[:, :, np.newaxis]
+    if sampler.channels > 1:
+        lin_x, lin_y = lin_x[np.newaxis], lin_y[np.newaxis]
+
+    # All octaves are evaluated in one call per band of rows, sized so the
+    # (octaves, rows, width) temporaries stay around FRACTAL_CHUNK_ELEMENTS
+    chunk_rows = max(
+        1, FRACTAL_CHUNK_ELEMENTS // max(1, sampler.channels * octaves * w)
+    )
+    scratch = np.empty(out.shape[:-2] + (min(h, chunk_rows), w), dtype=out.dtype)
+    for r in range(0, h, chunk_rows):
+        acc = out[..., r : r + chunk_rows, :]
+        tmp = scratch[..., : acc.shape[-2], :]
+        band_y = lin_y[..., r : r + chunk_rows, :]
+        if gradient_out is None:
+            layers = sampler.perlin(lin_x, band_y)
+        else:
+            layers, layers_dx, layers_dy = sampler.perlin_deriv(lin_x, band_y)
+            acc_dx = gradient_out[0][..., r : r + chunk_rows, :]
+            acc_dy = gradient_out[1][..., r : r + chunk_rows, :]
+
+        for k, amplitude in enumerate(amplitudes):
+            np.multiply(layers[..., k, :, :], amplitude, out=tmp)
+            np.add(acc, tmp, out=acc)
+            if gradient_out is not None:
+                np.multiply(layers_dx[..., k, :, :], amplitude * steps_x[k], out=tmp)
+                np.add(acc_dx, tmp, out=acc_dx)
+                np.multiply(layers_dy[..., k, :, :], amplitude * steps_y[k], out=tmp)
+                np.add(acc_dy, tmp, out=acc_dy)
+
+    out /= max_amplitude
+    if gradient_out is not None:
+        gradient_out /= max_amplitude
+    return out
@@ -0,0 +1,208 @@
+"""
+Out-of-core tiled terrain generation and erosion of memory-mapped heightmaps.
+"""
+
+import inspect
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .erosion import add_thermal_erosion
+from .noise import generate_fractal_perlin_noise
+
+
+def iter_tiles(shape, tile_size=1024):
+    """
+    Split a (height, width) grid into fixed-size tiles.
+
+    Args:
+        shape (tuple): Shape (height, width) of the full grid.
+        tile_size (int or tuple): Tile edge length, or (rows, cols) per tile.
+                                  Edge tiles are cropped to the grid.
+
+    Yields:
+        tuple: ((row_start, row_stop), (col_start, col_stop)) of each tile.
+    """
+    h, w = shape
+    th, tw = (tile_size, tile_size) if np.isscalar(tile_size) else tile_size
+    for r0 in range(0, h, th):
+        for c0 in range(0, w, tw):
+            yield (r0, min(r0 + th, h)), (c0, min(c0 + tw, w))
+
+
+def generate_tiled_terrain(
+    path,
+    shape=(100, 100),
+    tile_size=1024,
+    noisef=generate_fractal_perlin_noise,
+    dtype=np.float32,
+    **kwargs,
+):
+    """
+    Generate a heightmap tile by tile straight into a memory-mapped .npy file.
+
+    Peak memory is bounded by the temporaries of a single tile, so grids far
+    larger than RAM can be generated. Each tile samples the same coordinates as
+    the full grid, so the result is identical to in-memory generation.
+
+    Args:
+        path (str): Output .npy file, readable later with np.load(path, mmap_mode="r").
+        shape (tuple): Shape (height, width) of the full heightmap.
+        tile_size (int or tuple): Tile edge length, or (rows, cols) per tile.
+        noisef (callable): Noise function accepting shape and window keywords,
+                           e.g. generate_fractal_perlin_noise.
+        dtype (np.dtype): Data type of the stored heights.
+        **kwargs: Extra keyword arguments passed to noisef (scale, octaves, ...).
+
+    Returns:
+        np.memmap: The memory-mapped heightmap.
+    """
+    heightmap = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+    for window in iter_tiles(shape, tile_size):
+        (r0, r1), (c0, c1) = window
+        heightmap[r0:r1, c0:c1] = noisef(shape=shape, window=window, **kwargs)
+    heightmap.flush()
+    return heightmap
+
+
+def _erode_tile(src_path, dst_path, window, halo, erosion, kwargs):
+    src = np.load(src_path, mmap_mode="r")
+    h, w = src.shape
+    (r0, r1), (c0, c1) = window
+    # Read the tile with its halo, cropped where it reaches the map border
+    hr0, hr1 = max(r0 - halo, 0), min(r1 + halo, h)
+    hc0, hc1 = max(c0 - halo, 0), min(c1 + halo, w)
+    region = np.array(src[hr0:hr1, hc0:hc1])
+    interior = (slice(r0 - hr0, r1 - hr0), slice(c0 - hc0, c1 - hc0))
+    before = region[interior].copy()
+    del src
+
+    eroded = erosion(region, **kwargs)[interior]
+    # Only the interior is written, the halo belongs to the neighbouring tiles
+    dst = np.load(dst_path, mmap_mode="r+")
+    dst[r0:r1, c0:c1] = eroded
+    dst.flush()
+    del dst
+    return float(np.max(np.abs(eroded - before)))
+
+
+def _tile_droplets(droplets, window, halo, shape):
+    # Share of the droplets spawned on the tile and its halo, by area
+    h, w = shape
+    (r0, r1), (c0, c1) = window
+    rows = min(r1 + halo, h) - max(r0 - halo, 0)
+    cols = min(c1 + halo, w) - max(c0 - halo, 0)
+    return max(1, round(droplets * rows * cols / (h * w)))
+
+
+def erode_tiled(
+    path,
+    out_path,
+    erosion=add_thermal_erosion,
+    tile_size=1024,
+    halo=16,
+    passes=8,
+    tolerance=None,
+    workers=None,
+    seed=0,
+    **kwargs,
+):
+    """
+    Erode a memory-mapped heightmap tile by tile in a process pool.
+
+    Every pass each worker reads one tile plus a halo of neighbouring cells
+    from the previous pass, erodes it and writes back only the tile itself.
+    Passes alternate between two memory-mapped buffers, so the halos are
+    exchanged between passes by reading the neighbours' latest heights. An
+    erosion function that moves material at most halo cells per pass gives
+    the same result as eroding the whole map in memory, while each worker
+    only ever holds one tile.
+
+    add_thermal_erosion defaults to a fixed number of single resolution
+    sweeps that fit in the halo (a sweep reaches two cells) and to the talus
+    slope of the full map. Droplet erosion is only statistically seam-free:
+    droplets are spawned per tile, and a droplet crossing a tile border is
+    simulated independently by both tiles. An erosion taking a droplets count
+    gets a share of it proportional to the area of the tile and its halo, so
+    every pass spawns about droplets over the map, as in-memory erosion does.
+
+    Args:
+        path (str): Input .npy heightmap, e.g. from generate_tiled_terrain.
+        out_path (str): Output .npy file for the eroded heightmap.
+        erosion (callable): Top level function eroding a 2D array in place
+                            and returning it, called with **kwargs.
+        tile_size (int or tuple): Tile edge length, or (rows, cols) per tile.
+        halo (int): Width in cells of the neighbourhood read around each tile.
+        passes (int): Maximum number of passes over all tiles, at least 1.
+        tolerance (float): Stop early once no cell changes by more than this
+                           in a pass.
+        workers (int): Number of worker processes, defaults to the CPU count.
+        seed (int): Base seed, varied per pass and tile if erosion takes a seed.
+        **kwargs: Extra keyword arguments passed to erosion.
+
+    Returns:
+        np.memmap: The memory-mapped eroded heightmap.
+    """
+    if passes < 1:
+        raise ValueError("At least one erosion pass is required.")
+
+    src = np.load(path, mmap_mode="r")
+    shape, dtype = src.shape, src.dtype
+    del src
+
+    if erosion is add_thermal_erosion:
+        kwargs = {
+            "max_iterations": max(1, halo // 2),
+            "tolerance": 0.0,
+            "multigrid": False,
+            "extent": max(shape),
+            **kwargs,
+        }
+    parameters = inspect.signature(erosion).parameters
+    seeded = "seed" in parameters
+    droplets = None
+    if "droplets" in parameters:
+        droplets = kwargs.get("droplets", parameters["droplets"].default)
+
+    scratch = os.path.splitext(out_path)[0] + ".scratch.npy"
+    buffers = [out_path, scratch]
+    for buffer in buffers:
+        np.lib.format.open_memmap(buffer, mode="w+", dtype=dtype, shape=shape).flush()
+
+    tiles = list(iter_tiles(shape, tile_size))
+    src_path, dst_path = path, out_path
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for step in range(passes):
+            dst_path = buffers[step % 2]
+            futures = []
+            for index, window in enumerate(tiles):
+                tile_kwargs = dict(kwargs)
+                if seeded:
+                    entropy = np.random.SeedSequence((seed, step, index))
+                    tile_kwargs["seed"] = int(entropy.generate_state(1)[0])
+                if droplets is not None:
+                    tile_kwargs["droplets"] = _tile_droplets(
+                        droplets, window, halo, shape
+                    )
+                futures.append(
+                    pool.submit(
+                        _erode_tile,
+                        src_path,
+                        dst_path,
+                        window,
+                        halo,
+                        erosion,
+                        tile_kwargs,
+                    )
+                )
+            change = max(future.result() for future in futures)
+            src_path = dst_path
+            if tolerance is not None and change < tolerance:
+                break
+
+    if dst_path == scratch:
+        os.replace(scratch, out_path)
+    elif os.path.exists(scratch):
+        os.remove(scratch)
+    return np.load(out_path, mmap_mode="r+")
@@ -0,0 +1,134 @@
+"""
+Content-addressed LRU cache for terrain pipeline stages.
+"""
+
+import hashlib
+import sys
+from collections import OrderedDict
+
+import numpy as np
+
+# Default memory budget of a StageCache
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def _update_digest(digest, value):
+    """Feed a parameter value into a hash in a type-aware, order-stable way."""
+    if isinstance(value, np.ndarray):
+        digest.update(repr((value.shape, value.dtype.str)).encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        digest.update(b"{")
+        for key in sorted(value, key=repr):
+            digest.update(repr(key).encode())
+            _update_digest(digest, value[key])
+        digest.update(b"}")
+    elif isinstance(value, (list, tuple)):
+        digest.update(b"(")
+        for item in value:
+            _update_digest(digest, item)
+        digest.update(b")")
+    elif callable(value) and hasattr(value, "__qualname__"):
+        digest.update(f"{value.__module__}.{value.__qualname__}".encode())
+    else:
+        digest.update(repr(value).encode())
+    digest.update(b";")
+
+
+def stage_key(name, upstream=None, *params):
+    """
+    Compute the content key of a pipeline stage.
+
+    Args:
+        name (str): Name of the stage, e.g. "erosion".
+        upstream (str): Key of the stage whose output this stage consumes.
+        *params: Parameters of the stage (numbers, tuples, dicts, arrays, functions).
+
+    Returns:
+        str: Hex digest identifying the stage output.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(name.encode())
+    digest.update(repr(upstream).encode())
+    _update_digest(digest, params)
+    return digest.hexdigest()
+
+
+def _sizeof(value):
+    """Approximate memory held by a cached value in bytes."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (list, tuple)):
+        return sum(_sizeof(item) for item in value)
+    if hasattr(value, "actual_memory_size"):
+        # VTK datasets report their size in KiB
+        return value.actual_memory_size * 1024
+    return sys.getsizeof(value)
+
+
+def _freeze(value):
+    """Make cached arrays read-only so consumers can't modify them in place."""
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _freeze(item)
+
+
+class StageCache:
+    """
+    LRU cache of pipeline stage outputs keyed by stage_key.
+
+    A stage's key hashes its own parameters together with its upstream key, so
+    changing a parameter invalidates that stage and everything downstream of it
+    while earlier stages are reused. The least recently used entries are evicted
+    once the cached values exceed max_bytes.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.entries = OrderedDict()
+
+    def key(self, name, upstream=None, *params):
+        return stage_key(name, upstream, *params)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, compute):
+        """
+        Return the cached value for key, computing and storing it on a miss.
+
+        Args:
+            key (str): Key from stage_key.
+            compute (callable): Called without arguments to produce the value.
+        """
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key][0]
+
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        size = _sizeof(value)
+        if key in self.entries:
+            self.nbytes -= self.entries.pop(key)[1]
+        if size > self.max_bytes:
+            return
+
+        _freeze(value)
+        self.entries[key] = (value, size)
+        self.nbytes += size
+        while self.nbytes > self.max_bytes:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.nbytes -= evicted
+
+    def clear(self):
+        self.entries.clear()
+        self.nbytes = 0
@@ -0,0 +1,45 @@
+"""
+Dependency map from user-facing parameters to the pipeline stages they feed.
+"""
+
+
+class DependencyMap:
+    """
+    Ordered pipeline stages and the parameters each one reads.
+
+    Stages are listed upstream first and each consumes the output of the stage
+    before it, so a changed parameter affects its own stage and everything
+    downstream while earlier stages can be reused as they are.
+    """
+
+    def __init__(self, stages):
+        """
+        Args:
+            stages (list): (stage name, parameter names) pairs, upstream first.
+        """
+        self.stages = [name for name, _ in stages]
+        self.parameters = {name: set(params) for name, params in stages}
+
+    def first_affected(self, changed):
+        """
+        Index of the most upstream stage reading any of the changed parameters,
+        or None if no stage depends on them.
+        """
+        for i, stage in enumerate(self.stages):
+            if self.parameters[stage] & set(changed):
+                return i
+        return None
+
+    def affected(self, changed):
+        """
+        Stages that must be recomputed after the given parameters changed.
+
+        Args:
+            changed (iterable): Names of the changed parameters.
+        Returns:
+            list: Stage names, upstream first.
+        """
+        first = self.first_affected(changed)
+        if first is None:
+            return []
+        return self.stages[first:]
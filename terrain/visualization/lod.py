@@ -0,0 +1,222 @@
+"""
+Error-bounded adaptive triangulation of heightmaps for level of detail.
+
+Meshes are right-triangulated irregular networks (RTIN): the grid is split
+into two right triangles, and every triangle is recursively halved through
+the midpoint of its hypotenuse wherever linear interpolation along it would
+miss the heights by more than the error bound. The midpoints of every level
+lie on a regular sub-lattice of the grid, so both the error computation and
+the mesh extraction are vectorized over whole levels.
+"""
+
+import numpy as np
+import pyvista as pv
+
+# Default error bounds of the LOD meshes as fractions of the height range
+LOD_ERRORS = (0.002, 0.008, 0.032)
+
+
+def _pad_to_rtin(heights):
+    """Pad a heightmap by edge replication to a square of side 2**k + 1."""
+    h, w = heights.shape
+    side = 1 << int(np.ceil(np.log2(max(h, w, 2) - 1)))
+    return np.pad(heights, ((0, side + 1 - h), (0, side + 1 - w)), mode="edge")
+
+
+def _crossed(start, stop, line):
+    """Whether the open intervals (start, stop) contain line."""
+    return (start < line) & (line < stop)
+
+
+def rtin_errors(heights, shape=None):
+    """
+    Interpolation error of every vertex of the RTIN hierarchy.
+
+    The error of a vertex bounds the height error of the triangles split at
+    it: their interpolation error at the vertex plus the largest bound of
+    their children, as the difference between the two interpolations peaks
+    at the vertex. The bound of a vertex is at least that of every vertex it
+    depends on, so cutting the hierarchy at any error bound gives a mesh
+    without cracks.
+
+    Args:
+        heights (np.ndarray): Square heightmap of side 2**k + 1.
+        shape (tuple): (h, w) of the heightmap before padding. Triangles
+                       crossing its last row or column are always split, so
+                       no triangle reaches into the padding.
+    Returns:
+        np.ndarray: Error per vertex, float32 of the same shape.
+    """
+    h = heights.astype(np.float32)
+    side = h.shape[0] - 1
+    last_y, last_x = np.subtract(shape or h.shape, 1)
+    errors = np.zeros_like(h)
+
+    s = 2
+    while s <= side:
+        half, quarter = s // 2, s // 4
+        lines = np.arange(0, side + 1, s)
+        starts = lines[:-1]
+
+        # Midpoints of horizontal and vertical edges of length s
+        own_h = np.abs(h[::s, half::s] - (h[::s, :side:s] + h[::s, s::s]) / 2)
+        own_v = np.abs(h[half::s, ::s] - (h[:side:s, ::s] + h[s::s, ::s]) / 2)
+        own_h[_crossed(lines - half, lines + half, last_y), :] = np.inf
+        own_h[:, _crossed(starts, starts + s, last_x)] = np.inf
+        own_v[:, _crossed(lines - half, lines + half, last_x)] = np.inf
+        own_v[_crossed(starts, starts + s, last_y), :] = np.inf
+        if quarter:
+            # The children of the triangles split at an edge midpoint are
+            # split at the centers of the up to four squares of side half
+            # around it
+            centers = errors[quarter::half, quarter::half]
+            pairs = np.maximum(centers[:, 0::2], centers[:, 1::2])
+            children = np.zeros_like(own_h)
+            children[:-1] = pairs[0::2]
+            np.maximum(children[1:], pairs[1::2], out=children[1:])
+            own_h += children
+            pairs = np.maximum(centers[0::2], centers[1::2])
+            children = np.zeros_like(own_v)
+            children[:, :-1] = pairs[:, 0::2]
+            np.maximum(children[:, 1:], pairs[:, 1::2], out=children[:, 1:])
+            own_v += children
+        errors[::s, half::s] = own_h
+        errors[half::s, ::s] = own_v
+
+        # Centers of squares of side s, split along the diagonal through the
+        # center of their parent square
+        rows, cols = np.indices((len(starts), len(starts)))
+        main = (h[:side:s, :side:s] + h[s::s, s::s]) / 2
+        anti = (h[:side:s, s::s] + h[s::s, :side:s]) / 2
+        interpolated = np.where((rows + cols) % 2 == 0, main, anti)
+        own = np.abs(h[half::s, half::s] - interpolated)
+        own[_crossed(starts, starts + s, last_y), :] = np.inf
+        own[:, _crossed(starts, starts + s, last_x)] = np.inf
+        children = np.maximum(
+            np.maximum(errors[:side:s, half::s], errors[s::s, half::s]),
+            np.maximum(errors[half::s, :side:s], errors[half::s, s::s]),
+        )
+        own += children
+        errors[half::s, half::s] = own
+        s *= 2
+    return errors
+
+
+def rtin_triangles(errors, max_error):
+    """
+    Triangles of the RTIN mesh within max_error.
+
+    All triangles of one level have the same size, so every level is tested
+    and split at once, starting from the two halves of the grid. Corners are
+    flat indices into errors, whose midpoints are the mean of the indices.
+
+    Args:
+        errors (np.ndarray): Vertex errors from rtin_errors.
+        max_error (float): Largest allowed vertical error.
+    Returns:
+        np.ndarray: (n, 3) flat corner indices of every triangle.
+    """
+    size = errors.shape[0]
+    side = size - 1
+    flat = errors.ravel()
+    index_type = np.int32 if flat.size < 1 << 31 else np.int64
+    # Corners a and b span the hypotenuse, c is the right angle
+    a = np.array([0, size * size - 1], dtype=index_type)
+    b = a[::-1].copy()
+    c = np.array([side, side * size], dtype=index_type)
+    done = []
+    # Halving a triangle twice halves its legs, down to legs of one cell
+    for _ in range(2 * int(np.log2(side))):
+        m = (a + b) // 2
+        split = flat[m] > max_error
+        keep = ~split
+        done.append(np.stack([a[keep], b[keep], c[keep]], axis=1))
+        a, b, c, m = a[split], b[split], c[split], m[split]
+        a, b, c = np.concatenate([c, b]), np.concatenate([a, c]), np.concatenate([m, m])
+    done.append(np.stack([a, b, c], axis=1))
+    return np.concatenate(done)
+
+
+def triangles_to_mesh(terrain, triangles, size, spacing=1.0):
+    """
+    Build a PolyData surface from RTIN triangles over a terrain.
+
+    Triangles of a padded grid that lie in the padding are dropped.
+
+    Args:
+        terrain (np.ndarray): 2D heightmap.
+        triangles (np.ndarray): (n, 3) flat corner indices into the padded grid.
+        size (int): Side of the padded grid.
+        spacing (float): Distance between samples.
+    Returns:
+        pv.PolyData: Triangle mesh with the heights as point data "Data".
+    """
+    h, w = terrain.shape
+    real = np.zeros((size, size), dtype=bool)
+    real[:h, :w] = True
+    real = real.ravel()
+    corners = triangles.T
+    inside = real[corners[0]] & real[corners[1]] & real[corners[2]]
+    triangles = triangles[inside]
+
+    # Number the used grid points in order, without sorting the corners
+    used = np.zeros(size * size, dtype=bool)
+    used[triangles] = True
+    number = np.cumsum(used, dtype=triangles.dtype) - 1
+    used = np.flatnonzero(used)
+    faces = number[triangles]
+
+    y, x = np.divmod(used, size)
+    heights = terrain[y, x].astype(np.float32)
+    points = np.empty((len(used), 3), dtype=np.float32)
+    points[:, 0] = x * spacing
+    points[:, 1] = y * spacing
+    points[:, 2] = heights
+    mesh = pv.PolyData.from_regular_faces(points, faces)
+    mesh.point_data["Data"] = heights
+    return mesh
+
+
+def build_lod_meshes(terrain, max_errors=None, spacing=1.0):
+    """
+    Build adaptive meshes of a terrain at several error bounds.
+
+    Args:
+        terrain (np.ndarray): 2D heightmap.
+        max_errors (tuple): Vertical error bounds, finest first. Defaults to
+                            LOD_ERRORS times the height range.
+        spacing (float): Distance between samples.
+    Returns:
+        list: (max_error, pv.PolyData) per level, finest first.
+    """
+    if max_errors is None:
+        max_errors = [error * np.ptp(terrain) for error in LOD_ERRORS]
+    errors = rtin_errors(_pad_to_rtin(terrain), terrain.shape)
+    size = errors.shape[0]
+    return [
+        (
+            error,
+            triangles_to_mesh(terrain, rtin_triangles(errors, error), size, spacing),
+        )
+        for error in sorted(max_errors)
+    ]
+
+
+def select_lod(max_errors, distance, view_angle=30.0, screen_height=1080, pixels=1.0):
+    """
+    Pick the coarsest level whose error projects to at most a few pixels.
+
+    Args:
+        max_errors (list): Error bound of each level, finest first.
+        distance (float): Distance from the camera to the nearest terrain point.
+        view_angle (float): Vertical field of view of the camera in degrees.
+        screen_height (int): Viewport height in pixels.
+        pixels (float): Largest tolerated error on screen in pixels.
+    Returns:
+        int: Index of the level to show.
+    """
+    scale = screen_height / (
+        2 * max(distance, 1e-9) * np.tan(np.radians(view_angle) / 2)
+    )
+    visible = [i for i, error in enumerate(max_errors) if error * scale <= pixels]
+    return visible[-1] if visible else 0
@@ -4,22 +4,110 @@ Visualization utilities using PyVista.
 
 import numpy as np
 import pyvista as pv
-from scipy import ndimage
 
+from terrain.generation.ecology import compute_ecology, poisson_disk_sample
 
-def plot_terrain(plotter, terrain_array, show=True):
+# Samples per squared spacing of a saturated Poisson-disk set
+DISK_PACKING = 0.61
+
+
+def update_terrain(plotter, terrain_array, gradient=None, spacing=1.0, name="terrain"):
+    """
+    Show a heightmap in the plotter, reusing the terrain actor of the same name.
+    If the grid has the same dimensions, spacing and shading as before, the
+    heights, scalars and normals are written in place through numpy views of
+    the VTK arrays, which marks them modified, so only the changed buffers are
+    uploaded again. Otherwise, or if the actor shows another mesh such as a
+    level of detail from lod.py, it is replaced by a new plot_terrain mesh.
+    Returns the plotter and grid.
+    """
+    h, w = terrain_array.shape
+    actor = plotter.actors.get(name)
+    grid = None if actor is None else actor.mapper.dataset
+    if (
+        not isinstance(grid, pv.StructuredGrid)
+        or grid.dimensions != (h, w, 1)
+        or grid.field_data["spacing"][0] != spacing
+        or (grid.point_data.active_normals is None) != (gradient is None)
+    ):
+        return plot_terrain(
+            plotter,
+            terrain_array,
+            show=False,
+            gradient=gradient,
+            spacing=spacing,
+            name=name,
+        )
+
+    heights = terrain_array.ravel(order="F")
+    grid.points[:, 2] = heights
+    grid.active_scalars[:] = heights
+    if gradient is not None:
+        normals = grid.point_data.active_normals
+        normals[:] = terrain_normals(gradient, spacing)
+    actor.mapper.scalar_range = (float(heights.min()), float(heights.max()))
+    return plotter, grid
+
+
+def terrain_normals(gradient, spacing=1.0, out=None):
+    """
+    Unit shading normals of a terrain grid from its gradient (d/dx, d/dy) per
+    grid cell, in the Fortran point order of plot_terrain.
+    Writes into out, an (n, 3) array, when given.
+    """
+    # The grid's cell winding faces -z, so normals follow that orientation
+    gx, gy = gradient
+    normals = np.empty((gx.size, 3), dtype=np.float32) if out is None else out
+    normals[:, 0] = np.ravel(gx, order="F") / spacing
+    normals[:, 1] = np.ravel(gy, order="F") / spacing
+    normals[:, 2] = -1
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+    return normals
+
+
+def grid_points(terrain_array, spacing=1.0, origin=(0.0, 0.0)):
+    """
+    Points of a terrain grid in the Fortran point order of plot_terrain,
+    written straight into the float32 buffer handed to VTK. The x and y
+    coordinates are broadcast from one row and column instead of building
+    full meshgrid lattices, and the heights are converted in place, so no
+    temporaries of the grid size are allocated.
+    The first sample is placed at the (x, y) origin.
+    """
+    h, w = terrain_array.shape
+    points = np.empty((w, h, 3), dtype=np.float32)
+    points[..., 0] = (np.arange(w, dtype=np.float32) * spacing + origin[0])[:, None]
+    points[..., 1] = np.arange(h, dtype=np.float32) * spacing + origin[1]
+    points[..., 2] = terrain_array.T
+    return points.reshape(-1, 3)
+
+
+def plot_terrain(
+    plotter,
+    terrain_array,
+    show=True,
+    gradient=None,
+    spacing=1.0,
+    name=None,
+    origin=(0.0, 0.0),
+):
     """
     Visualize a 2D numpy array as a 3D surface using PyVista.
+    If gradient (d/dx, d/dy) of the heights per grid cell is given, e.g. analytic
+    noise derivatives scaled like the heights, it is used for smooth shading
+    normals instead of letting VTK recompute them from the surface.
+    Spacing is the distance between samples, so a downsampled preview covers the
+    same extent as the full resolution terrain.
+    A name replaces the plotter's actor of the same name, see update_terrain.
+    The origin is the (x, y) position of the first sample, e.g. of a chunk.
     Returns the plotter and grid for further modification.
     """
     if not isinstance(terrain_array, np.ndarray) or terrain_array.ndim != 2:
         raise ValueError("Input must be a 2D numpy array.")
     h, w = terrain_array.shape
-    x = np.arange(w, dtype=np.float32)
-    y = np.arange(h, dtype=np.float32)
-    xx, yy = np.meshgrid(x, y)
-    zz = terrain_array.astype(np.float32)
-    grid = pv.StructuredGrid(xx, yy, zz)
+    grid = pv.StructuredGrid()
+    grid.dimensions = (h, w, 1)
+    grid.points = grid_points(terrain_array, spacing, origin)
     # min_h, max_h = np.min(zz), np.max(zz)
     # thresholds = [
     #     min_h,
@@ -39,49 +127,110 @@ def plot_terrain(plotter, terrain_array, show=True):
     # terrain_type[(zz >= thresholds[1]) & (zz < thresholds[2])] = 1
     # terrain_type[(zz >= thresholds[2]) & (zz < thresholds[3])] = 2
     # terrain_type[zz >= thresholds[3]] = 3
-    plotter.add_mesh(
+    if gradient is not None:
+        grid.point_data.active_normals = terrain_normals(gradient, spacing)
+    grid.field_data["spacing"] = [spacing]
+    actor = plotter.add_mesh(
         grid,
-        scalars=terrain_array.ravel(order="F"),
+        scalars=np.ravel(terrain_array, order="F").astype(np.float32, copy=False),
         show_edges=False,
         cmap="terrain",
+        name=name,
     )
+    if gradient is not None:
+        actor.prop.interpolation = "gouraud"
     if show:
         plotter.show()
     return plotter, grid
 
 
-def generate_tree_density(terrain, size=128):
-    """Generate a tree density map based on terrain attributes"""
-    # Trees grow better at mid elevations (not too high, not too low)
-    min_height, max_height = np.min(terrain), np.max(terrain)
-    mid_height = (min_height + max_height) / 2
-
-    # Create initial density map based on height
-    density = np.zeros_like(terrain)
-
-    # More trees at mid elevations, fewer at very low or high elevations
-    for i in range(size):
-        for j in range(size):
-            height = terrain[i, j]
-            # Forest band between 20-60% of max height
-            if height > min_height + 0.2 * (
-                max_height - min_height
-            ) and height < min_height + 0.6 * (max_height - min_height):
-                density[i, j] = 1.0 - abs(height - mid_height * 0.8) / (
-                    max_height * 0.4
-                )
-            else:
-                density[i, j] = 0.1  # Use 0.1 for sparse trees elsewhere
-    # Add some noise to make forest edges look natural
-    noise = np.random.rand(size, size) * 0.3
-    density = np.clip(density + noise, 0, 1)
-    # Smooth the density map
-    density = ndimage.gaussian_filter(density, sigma=2.0)
-    return density
+def generate_tree_density(terrain, size=None, seed=0, gradient=None):
+    """
+    Generate a tree density map based on terrain attributes, see
+    compute_ecology. size is unused and kept for compatibility, the density
+    map always matches the shape of the terrain. A gradient (d/dx, d/dy) per
+    grid cell replaces the finite difference slope.
+    """
+    return compute_ecology(terrain, seed=seed, gradient=gradient)[0]
+
+
+def tree_points(terrain, xy):
+    """
+    Place sample positions (x, y) in cell units, where grid point (i, j) owns
+    the cell [j, j + 1) x [i, i + 1), on the terrain surface.
+    Returns the (n, 3) points in the coordinates of plot_terrain.
+    """
+    cols = np.minimum(xy[:, 0].astype(int), terrain.shape[1] - 1)
+    rows = np.minimum(xy[:, 1].astype(int), terrain.shape[0] - 1)
+    return np.column_stack([xy - 0.5, terrain[rows, cols]]).astype(np.float32)
 
 
-def visualize_terrain_with_trees(plotter, terrain, tree_density, tree_threshold=0.7):
-    """Create a PyVista visualization of terrain with trees"""
+def sample_trees(
+    terrain,
+    tree_density,
+    tree_threshold=0.7,
+    min_height=-np.inf,
+    max_height=np.inf,
+    seed=42,
+):
+    """
+    Place trees on a terrain as blue noise following the density map.
+    Cells between min_height and max_height get on average
+    density * tree_threshold * 0.3 trees, spaced by poisson_disk_sample.
+    Returns the (n, 3) tree base points and the heights and radii of the trees.
+    """
+    rng = np.random.default_rng(seed)
+    # Reduce overall number of trees by lowering the trees per cell
+    trees_per_cell = tree_threshold * 0.3
+    band = (terrain >= min_height) & (terrain < max_height)
+    xy = poisson_disk_sample(
+        np.where(band, np.clip(tree_density, 0, 1), 0),
+        min_distance=np.sqrt(DISK_PACKING / trees_per_cell),
+        seed=seed,
+    )
+    points = tree_points(terrain, xy)
+
+    n = len(points)
+    heights = rng.uniform(1.5, 3.5, size=n).astype(np.float32)
+    radii = rng.uniform(0.18, 0.5, size=n).astype(np.float32)
+    return points, heights, radii
+
+
+def instance_mesh(template, positions, scales, scalars=None):
+    """
+    Copy a template mesh to every position in one vectorized pass.
+    The template is scaled per axis by scales (n, 3) and translated by
+    positions (n, 3). scalars maps point data names to one value per instance.
+    Returns a single PolyData holding all instances.
+    """
+    n, k = len(positions), template.n_points
+    template_points = np.asarray(template.points, dtype=np.float32)
+    points = template_points[None] * scales[:, None] + positions[:, None]
+
+    # Offset the point ids of every copy of the cells, but not the cell sizes
+    faces = template.faces
+    is_id = np.ones(len(faces), dtype=bool)
+    i = 0
+    while i < len(faces):
+        is_id[i] = False
+        i += faces[i] + 1
+    offsets = np.arange(n, dtype=faces.dtype)[:, None] * k * is_id
+    mesh = pv.PolyData(points.reshape(-1, 3), (faces + offsets).ravel())
+
+    for name, values in (scalars or {}).items():
+        mesh.point_data[name] = np.repeat(values, k)
+    return mesh
+
+
+def build_tree_mesh(terrain, tree_density, tree_threshold=0.7, resolution=16):
+    """
+    Build the tree geometry for a terrain without adding it to a plotter,
+    so it can be cached separately from rendering.
+    All trees are instances of one cone built by instance_mesh, with resolution
+    sides; fewer sides make a lighter mesh for dense forests but rougher cones.
+    The tree top heights are stored in point_data["tree_height"].
+    Returns None if no trees were placed.
+    """
     # size = terrain.shape[0]
 
     # # Create coordinate grid
@@ -134,75 +283,49 @@ def visualize_terrain_with_trees(plotter, terrain, tree_density, tree_threshold=
     #     cmap="terrain",
     # )
 
-    # Add trees as instanced geometry with sparse sampling
-    sparse_factor = 4  # Only place trees on every 4th point (adjust as needed)
-    sampled_mask = np.zeros_like(tree_density, dtype=bool)
-    sampled_mask[::sparse_factor, ::sparse_factor] = True
-
-    # Improved random tree distribution based on density probability
-    max_tree_height = thresholds[2]  # No trees above mountain transition
-    rng = np.random.default_rng(42)
-    tree_points = []
-    tree_heights = []
-    tree_radii = []
-    for y in range(terrain.shape[0]):
-        for x in range(terrain.shape[1]):
-            # Prevent trees in water
-            if terrain[y, x] < thresholds[1]:
-                continue
-            if terrain[y, x] < max_tree_height:
-                # Use density as probability for tree placement
-                # Reduce overall number of trees by lowering probability
-                if rng.uniform(0, 1) < tree_density[y, x] * tree_threshold * 0.3:
-                    dx = float(rng.uniform(-0.5, 0.5))
-                    dy = float(rng.uniform(-0.5, 0.5))
-                    px = float(x) + dx
-                    py = float(y) + dy
-                    pz = float(terrain[y, x])
-                    tree_points.append([px, py, pz])
-                    # Even taller and much thinner trees
-                    tree_heights.append(rng.uniform(1.5, 3.5))
-                    tree_radii.append(rng.uniform(0.18, 0.5))
-    tree_points = np.array(tree_points)
-    tree_heights = np.array(tree_heights)
-    tree_radii = np.array(tree_radii)
-
-    # If we have tree points, create geometry
-    if len(tree_points) > 0:
-        tree_meshes = []
-        point_scalars = []
-        for pt, height, radius in zip(tree_points, tree_heights, tree_radii):
-            cone = pv.Cone(
-                center=(pt[0], pt[1], pt[2] + height / 2),
-                direction=(0, 0, 1),
-                height=height,
-                radius=radius,
-                resolution=16,
-            )
-            tree_meshes.append(cone)
-            point_scalars.extend([pt[2] + height] * cone.n_points)
-
-        all_trees = tree_meshes[0].copy()
-        for mesh in tree_meshes[1:]:
-            all_trees = all_trees.merge(mesh)
-
-        # point_scalars = -np.array(point_scalars)
-        # point_scalars = (point_scalars - np.min(point_scalars)) / (
-        #     np.max(point_scalars) - np.min(point_scalars)
-        # )
-
-        plotter.add_mesh(
-            all_trees,
-            scalars=point_scalars,
-            cmap="Greens",
-            show_scalar_bar=False,
-        )
-        # plotter.add_mesh(
-        #     all_trees,
-        #     scalars=point_scalars.ravel(),
-        #     cmap="Greens",
-        #     show_scalar_bar=False,
-        # )
+    # Add trees as instanced geometry
+    points, heights, radii = sample_trees(
+        terrain,
+        tree_density,
+        tree_threshold,
+        min_height=thresholds[1],  # Prevent trees in water
+        max_height=thresholds[2],  # No trees above mountain transition
+    )
+    if len(points) == 0:
+        return None
+
+    # Even taller and much thinner trees, a unit cone standing on its base
+    cone = pv.Cone(
+        center=(0, 0, 0.5),
+        direction=(0, 0, 1),
+        height=1.0,
+        radius=1.0,
+        resolution=resolution,
+    )
+    scales = np.column_stack([radii, radii, heights])
+    return instance_mesh(cone, points, scales, {"tree_height": points[:, 2] + heights})
+
+
+def add_tree_mesh(plotter, tree_mesh, name="trees"):
+    """
+    Add a mesh from build_tree_mesh to the plotter, colored by tree height.
+    It replaces the plotter's previous trees, which are removed for None.
+    """
+    if tree_mesh is None:
+        plotter.remove_actor(name)
+        return
+    plotter.add_mesh(
+        tree_mesh,
+        scalars="tree_height",
+        cmap="Greens",
+        show_scalar_bar=False,
+        name=name,
+    )
+
+
+def visualize_terrain_with_trees(plotter, terrain, tree_density, tree_threshold=0.7):
+    """Create a PyVista visualization of terrain with trees"""
+    add_tree_mesh(plotter, build_tree_mesh(terrain, tree_density, tree_threshold))
 
 
 def add_trees_to_plotter(
@@ -222,27 +345,14 @@ def add_trees_to_plotter(
     rng = np.random.default_rng(seed)
 
     # Sparse sampling - critical for performance and visualization quality
-    sparse_factor = 5  # Use every 5th point in each dimension
-    sampled_mask = np.zeros_like(tree_density_map, dtype=bool)
-    sampled_mask[::sparse_factor, ::sparse_factor] = True
+    sparse_factor = 5  # Keep trees about 5 points apart
 
     # Create mask for where trees should be placed
-    mask = (
-        (tree_density_map > tree_threshold)
-        & (terrain_array < max_tree_height)
-        & sampled_mask
-    )
-    tree_indices = np.argwhere(mask)
+    mask = (tree_density_map > tree_threshold) & (terrain_array < max_tree_height)
 
     # Create points for trees
-    points = np.zeros((len(tree_indices), 3))
-    for i, (y_idx, x_idx) in enumerate(tree_indices):
-        dx = rng.uniform(-0.4, 0.4)
-        dy = rng.uniform(-0.4, 0.4)
-        x = float(x_idx) + dx
-        y = float(y_idx) + dy
-        z = float(terrain_array[y_idx, x_idx])
-        points[i] = [x, y, z]
+    xy = poisson_disk_sample(mask.astype(float), min_distance=sparse_factor, seed=seed)
+    points = tree_points(terrain_array, xy)
 
     # Create varying tree heights for natural appearance
     heights = tree_height * rng.uniform(0.8, 1.2, size=len(points))